@@ -9,14 +9,9 @@
     :license: BSD, see LICENSE for more details.
 """
 from __future__ import absolute_import, unicode_literals
-import codecs
+import importlib
 import sys
-
-import six
-
-from . import hangul, l10n, morphology
-from .morphology import (Morpheme, Noun, NumberWord, Loanword, Particle,
-                         Substantive)
+import types
 
 
 __version__ = '0.1.9'
@@ -24,35 +19,54 @@ __all__ = ['hangul', 'l10n', 'morphology', 'Morpheme', 'Noun', 'NumberWord',
            'Loanword', 'Particle', 'Substantive']
 
 
+#: The submodules and the morpheme classes by the submodules which have them.
+#: They are imported at the first access.
+_lazy_names = {'hangul': None, 'l10n': None, 'morphology': None,
+               'Morpheme': 'morphology', 'Noun': 'morphology',
+               'NumberWord': 'morphology', 'Loanword': 'morphology',
+               'Particle': 'morphology', 'Substantive': 'morphology'}
+
+
 # Python 2's import seems to do not work with unicode __all__.
 # __future__.unicode_literals could make a TypeError with "from __ import *".
 if sys.version_info < (3,):
-    for mod in [globals(), hangul, l10n, morphology]:
-        if isinstance(mod, dict):
-            mod['__all__'] = map(str, mod['__all__'])
-        else:
-            mod.__all__ = map(str, mod.__all__)
-
-
-def _load_data():
-    """Loads allomorphic particles and number words from :file:`data.json`."""
-    import json
-    import os
-    path = os.path.join(os.path.dirname(__file__), 'data.json')
-    with codecs.open(path, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-    # register allomorphic particles
-    for forms in six.itervalues(data['allomorphic_particles']):
-        particle = Particle(*forms)
-        for form in forms:
-            Particle.register(form, particle)
-    # register numbers and digits
-    for number, form in six.iteritems(data['numbers']):
-        NumberWord.__numbers__[int(number)] = form
-    for digit, form in six.iteritems(data['digits']):
-        NumberWord.__digits__[int(digit)] = form
-    for operation, form in six.iteritems(data['unary_operations']):
-        NumberWord.__unary_operations__[operation] = form
-
-
-_load_data()
+    __all__ = map(str, __all__)
+
+
+class _LazyModule(types.ModuleType):
+    """The type of :mod:`korean` module. It imports the submodules and the
+    morpheme classes on demand. Then ``import korean`` doesn't import the
+    whole morphology stack. A module type is used instead of module
+    ``__getattr__`` which Python 2 doesn't support.
+
+    .. versionadded:: 0.1.10
+    """
+
+    def __getattr__(self, name):
+        try:
+            module_name = _lazy_names[name]
+        except KeyError:
+            raise AttributeError('module {0!r} has no attribute '
+                                 '{1!r}'.format(self.__name__, name))
+        module = importlib.import_module('.' + (module_name or name),
+                                         self.__name__)
+        value = module if module_name is None else getattr(module, name)
+        setattr(self, name, value)
+        return value
+
+    def __dir__(self):
+        return sorted(set(self.__dict__) | set(__all__))
+
+
+def _replace_module():
+    """Replaces this module in :data:`sys.modules` with a lazy module which
+    has the same attributes.
+    """
+    module = _LazyModule(__name__)
+    module.__dict__.update(globals())
+    # keep this module alive. Python 2 clears the globals of a freed module.
+    module._original_module = sys.modules[__name__]
+    sys.modules[__name__] = module
+
+
+_replace_module()
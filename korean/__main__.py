@@ -3,40 +3,262 @@
     korean.__main__
     ~~~~~~~~~~~~~~~
 
-    Command-line tools.
+    Command-line tools. Run them by ``python -m korean <command>``. They
+    need Baker_. On Python 3, they run from the package converted by 2to3
+    like the rest of the package. :file:`setup.py` does it on installation.
+
+    .. _Baker: https://pypi.python.org/pypi/Baker
 
     :copyright: (c) 2012-2013 by Heungsub Lee
     :license: BSD, see LICENSE for more details.
 """
-from __future__ import absolute_import
+from __future__ import absolute_import, division, unicode_literals
+import codecs
 import contextlib
+import gettext
+import json
+import multiprocessing
+import os
+import struct
 import sys
+import time
 
 from baker import Baker
+import six
 
 from . import l10n
 
 
 baker = Baker()
+stdout = getattr(sys.stdout, 'buffer', sys.stdout)
+
+
+#: The number of bytes to read at once.
+CHUNK_SIZE = 64 * 1024
 
 
 @contextlib.contextmanager
 def file_or_stdin(path):
-    f = open(path) if path is not None else sys.stdin
+    if path is not None:
+        f = open(path, 'rb')
+    else:
+        f = getattr(sys.stdin, 'buffer', sys.stdin)
     yield f
     f.close()
 
 
+def read_chunks(f, size=CHUNK_SIZE):
+    """Reads the file by the given size of bytes."""
+    return iter(lambda: f.read(size), b'')
+
+
+def read_line_chunks(f, size=CHUNK_SIZE):
+    """Reads the file by chunks of about the given size of bytes. Every chunk
+    but the last one ends with a newline.
+    """
+    pending = b''
+    for data in read_chunks(f, size):
+        data = pending + data
+        end = data.rfind(b'\n') + 1
+        if end:
+            yield data[:end]
+        pending = data[end:]
+    if pending:
+        yield pending
+
+
+def _proofread_chunk(args):
+    """Proofreads a line-aligned chunk in a worker process. Returns a tuple of
+    the encoded result, the size and the number of lines of the chunk.
+    """
+    data, charset = args
+    text = l10n.proofread(data.decode(charset))
+    return text.encode(charset), len(data), data.count(b'\n')
+
+
+def _proofread_file(f, charset):
+    """Proofreads the file in this process. Yields tuples like
+    :func:`_proofread_chunk`.
+    """
+    decoder = codecs.getincrementaldecoder(charset)()
+    counts = []
+    def decode():
+        for data in read_chunks(f):
+            counts.append((len(data), data.count(b'\n')))
+            yield decoder.decode(data)
+        yield decoder.decode(b'', True)
+    def pop_counts():
+        size, lines = [sum(x) for x in zip((0, 0), *counts)]
+        del counts[:]
+        return size, lines
+    for text in l10n.proofread_stream(decode()):
+        yield (text.encode(charset),) + pop_counts()
+    yield (b'',) + pop_counts()
+
+
 @baker.command
-def proofread(path=None, charset='utf-8'):
+def proofread(path=None, charset='utf-8', jobs=1, report=False):
+    """Proofreads naive particles in the file or stdin and prints the result.
+
+    :param path: the file path. Stdin is read if it is not given.
+    :param charset: the charset of the input and output.
+    :param jobs: the number of processes to proofread line-aligned chunks of
+                 the input in parallel. The charset should be ASCII
+                 compatible such as UTF-8 to split lines.
+    :param report: prints the throughput to stderr.
+    """
+    jobs = int(jobs)
+    started_at = time.time()
+    size = lines = 0
     with file_or_stdin(path) as f:
-        for line in f.xreadlines():
-            print l10n.proofread(line.decode(charset)),
+        if jobs > 1:
+            pool = multiprocessing.Pool(jobs)
+            chunks = ((data, charset) for data in read_line_chunks(f))
+            results = pool.imap(_proofread_chunk, chunks)
+        else:
+            pool, results = None, _proofread_file(f, charset)
+        try:
+            for data, length, count in results:
+                stdout.write(data)
+                size += length
+                lines += count
+        finally:
+            if pool is not None:
+                pool.terminate()
+                pool.join()
+    stdout.flush()
+    if report:
+        elapsed = max(time.time() - started_at, 1e-9)
+        sys.stderr.write('{0} lines, {1:.2f} MB in {2:.2f} s: '
+                         '{3:.0f} lines/s, {4:.2f} MB/s\n'
+                         ''.format(lines, size / 1e6, elapsed,
+                                   lines / elapsed, size / 1e6 / elapsed))
+
+
+def iter_files(path, exts):
+    """Yields the file paths under the directory which end with one of the
+    extensions. The path is yielded as it is if it's not a directory.
+    """
+    if not os.path.isdir(path):
+        yield path
+        return
+    for root, dirs, files in os.walk(path):
+        dirs.sort()
+        for filename in sorted(files):
+            if os.path.splitext(filename)[1].lstrip('.') in exts:
+                yield os.path.join(root, filename)
+
+
+def iter_lines(f, path, charset):
+    """Yields tuples of the line number and the line to validate. For a
+    Gettext catalog, only translated messages are yielded. The line number of
+    a message in a ``.mo`` file is the index of the message.
+    """
+    if path.endswith('.mo'):
+        translations = gettext.GNUTranslations(f)
+        messages = [(msgid, msgstr) for msgid, msgstr
+                    in six.iteritems(translations._catalog) if msgid]
+        messages.sort(key=lambda x: x[0] if isinstance(x[0], tuple)
+                                    else (x[0], -1))
+        for x, (msgid, msgstr) in enumerate(messages):
+            yield x + 1, msgstr
+        return
+    text = f.read().decode(charset, 'replace')
+    in_msgstr = False
+    for x, line in enumerate(text.splitlines()):
+        if path.endswith('.po'):
+            if line.startswith('msgstr'):
+                in_msgstr = True
+            elif not line.startswith('"'):
+                in_msgstr = False
+            if not in_msgstr:
+                continue
+        yield x + 1, line
+
+
+def _validate_file(args):
+    """Validates a file in a worker process. Returns a list of errors. A file
+    which can't be read such as a broken ``.mo`` file makes an error with only
+    ``path`` and ``error``.
+    """
+    path, charset = args
+    errors = []
+    try:
+        with file_or_stdin(path) as f:
+            for lineno, line in iter_lines(f, path or '-', charset):
+                for start, end, word, expected in \
+                    l10n.validate.finditer(line):
+                    errors.append({'path': path or '-', 'line': lineno,
+                                   'column': start + 1, 'word': word,
+                                   'found': line[start:end],
+                                   'expected': expected})
+    except (IOError, OSError, struct.error) as exc:
+        # struct.error is from a truncated Gettext catalog
+        error = getattr(exc, 'strerror', None) or six.text_type(exc)
+        errors.append({'path': path or '-', 'error': error})
+    return errors
 
 
 @baker.command
-def validate(path=None, charset='utf-8'):
-    pass
+def validate(path=None, charset='utf-8', jobs=1, format='text',
+             exts='po,mo,txt'):
+    """Finds particles which don't agree with the syllable before them such
+    as "사과을" in text files or Gettext catalogs. Exits with 1 if there are
+    errors.
+
+    :param path: the file or directory path. Stdin is read if it is not
+                 given.
+    :param charset: the charset of text files and ``.po`` files.
+    :param jobs: the number of processes to validate files in parallel.
+    :param format: ``text`` prints ``path:line:column: message`` lines.
+                   ``json`` prints a JSON array of errors.
+    :param exts: comma-separated extensions of files to validate in a
+                 directory.
+    """
+    jobs = int(jobs)
+    paths = [None] if path is None else iter_files(path, exts.split(','))
+    tasks = ((path, charset) for path in paths)
+    if jobs > 1:
+        pool = multiprocessing.Pool(jobs)
+        results = pool.imap(_validate_file, tasks, chunksize=16)
+    else:
+        pool, results = None, six.moves.map(_validate_file, tasks)
+    errors = []
+    try:
+        for file_errors in results:
+            if format == 'json':
+                errors.extend(file_errors)
+                continue
+            for error in file_errors:
+                errors.append(error)
+                if 'error' in error:
+                    msg = '{path}: {error}\n'.format(**error)
+                else:
+                    msg = '{path}:{line}:{column}: {found} should be ' \
+                          '{expected} ({word})\n'.format(**error)
+                stdout.write(msg.encode('utf-8'))
+    finally:
+        if pool is not None:
+            pool.terminate()
+            pool.join()
+    if format == 'json':
+        stdout.write(json.dumps(errors, ensure_ascii=False, indent=2,
+                                sort_keys=True).encode('utf-8') + b'\n')
+    stdout.flush()
+    if errors:
+        sys.exit(1)
+
+
+@baker.command
+def snapshot(path=None):
+    """Builds the snapshot of the data tables to be loaded faster than
+    :file:`data.json`.
+
+    :param path: the snapshot path. The default is next to
+                 :file:`data.json`.
+    """
+    from . import data
+    data.build_snapshot(path or data.SNAPSHOT_PATH)
 
 
 if __name__ == '__main__':
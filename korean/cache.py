@@ -0,0 +1,322 @@
+# -*- coding: utf-8 -*-
+"""
+    korean.cache
+    ~~~~~~~~~~~~
+
+    Caches for the results which are expensive to make such as readings of
+    substantives. :class:`LRUCache` keeps them in memory. :class:`SQLiteCache`
+    keeps them in a file to be reused by other processes and
+    :class:`TieredCache` puts an :class:`LRUCache` in front of it.
+
+    .. versionadded:: 0.1.10
+
+    :copyright: (c) 2012-2013 by Heungsub Lee
+    :license: BSD, see LICENSE for more details.
+"""
+from __future__ import absolute_import, division, unicode_literals
+import threading
+
+
+__all__ = ['LRUCache', 'SQLiteCache', 'TieredCache']
+
+
+PREV, NEXT, KEY, VALUE = range(4)
+
+
+class LRUCache(object):
+    """A thread-safe mapping which keeps only the recently used items. When it
+    is full, the least recently used item is evicted. It counts hits, misses
+    and evictions to be scraped by :meth:`stats`:
+
+        >>> cache = LRUCache(2)
+        >>> cache['a'], cache['b'], cache['c'] = 1, 2, 3
+        >>> 'a' in cache
+        False
+        >>> cache.stats()
+        {'hits': 0, 'misses': 0, 'evictions': 1, 'size': 2, 'maxsize': 2}
+
+    :param maxsize: the max number of items. ``None`` means unbounded and
+                    ``0`` disables the cache.
+    """
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._data = {}
+        # a circular doubly linked list from the least recently used item
+        self._root = []
+        self._root[:] = [self._root, self._root, None, None]
+        self.hits = self.misses = self.evictions = 0
+
+    def _unlink(self, link):
+        link[PREV][NEXT], link[NEXT][PREV] = link[NEXT], link[PREV]
+
+    def _append(self, link):
+        last = self._root[PREV]
+        link[PREV], link[NEXT] = last, self._root
+        last[NEXT] = self._root[PREV] = link
+
+    def _evict(self):
+        while self.maxsize is not None and len(self._data) > self.maxsize:
+            oldest = self._root[NEXT]
+            self._unlink(oldest)
+            del self._data[oldest[KEY]]
+            self.evictions += 1
+
+    def __getitem__(self, key):
+        with self._lock:
+            try:
+                link = self._data[key]
+            except KeyError:
+                self.misses += 1
+                raise
+            self.hits += 1
+            self._unlink(link)
+            self._append(link)
+            return link[VALUE]
+
+    def __setitem__(self, key, value):
+        with self._lock:
+            try:
+                link = self._data[key]
+            except KeyError:
+                link = [None, None, key, value]
+                self._data[key] = link
+            else:
+                link[VALUE] = value
+                self._unlink(link)
+            self._append(link)
+            self._evict()
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def set(self, key, value):
+        """Sets the item. It is the same as Django's cache API."""
+        self[key] = value
+
+    def setdefault(self, key, value):
+        """Returns the item if the key is in the cache. Otherwise sets the
+        value and returns it. It is atomic unlike a lookup and a set.
+        """
+        with self._lock:
+            try:
+                link = self._data[key]
+            except KeyError:
+                link = [None, None, key, value]
+                self._data[key] = link
+                self._append(link)
+                self._evict()
+                return value
+            self._unlink(link)
+            self._append(link)
+            return link[VALUE]
+
+    def resize(self, maxsize):
+        """Changes the max size. Items over the new size are evicted."""
+        with self._lock:
+            self.maxsize = maxsize
+            self._evict()
+
+    def update(self, items):
+        """Sets the items from an iterable of key-value pairs.
+
+        .. versionadded:: 0.1.10
+        """
+        for key, value in items:
+            self[key] = value
+
+    def clear(self):
+        """Removes all items. The counters are not reset."""
+        with self._lock:
+            self._data.clear()
+            self._root[:] = [self._root, self._root, None, None]
+
+    def stats(self):
+        """Returns the counters and the size as a dict."""
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses,
+                    'evictions': self.evictions, 'size': len(self._data),
+                    'maxsize': self.maxsize}
+
+    def __repr__(self):
+        return '<{0} {1}/{2}>'.format(type(self).__name__, len(self._data),
+                                      self.maxsize)
+
+
+class SQLiteCache(object):
+    """A persistent mapping from text keys to text values in a SQLite
+    database file. Many processes can share the file. Writes are not synced
+    to the disk at once because the values can be made again.
+
+        >>> cache = SQLiteCache('readings.db')
+        >>> cache['italia'] = '이탈리아'
+        >>> SQLiteCache('readings.db')['italia']
+        '이탈리아'
+
+    :param path: the database file path. ``':memory:'`` makes a temporary
+                 database.
+
+    .. versionadded:: 0.1.10
+    """
+
+    def __init__(self, path):
+        import sqlite3
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False,
+                                   isolation_level=None)
+        self._db.execute('PRAGMA synchronous = OFF')
+        self._db.execute('CREATE TABLE IF NOT EXISTS cache '
+                         '(key TEXT PRIMARY KEY, value TEXT)')
+        self.hits = self.misses = 0
+
+    def __getitem__(self, key):
+        with self._lock:
+            row = self._db.execute('SELECT value FROM cache WHERE key = ?',
+                                   (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                raise KeyError(key)
+            self.hits += 1
+            return row[0]
+
+    def __setitem__(self, key, value):
+        with self._lock:
+            self._db.execute('INSERT OR REPLACE INTO cache VALUES (?, ?)',
+                             (key, value))
+
+    def __contains__(self, key):
+        with self._lock:
+            return self._db.execute('SELECT 1 FROM cache WHERE key = ?',
+                                    (key,)).fetchone() is not None
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute('SELECT COUNT(*) FROM cache').fetchone()[0]
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def set(self, key, value):
+        self[key] = value
+
+    def update(self, items):
+        """Sets the items from an iterable of key-value pairs in a
+        transaction.
+        """
+        with self._lock:
+            self._db.execute('BEGIN')
+            try:
+                self._db.executemany('INSERT OR REPLACE INTO cache '
+                                     'VALUES (?, ?)', items)
+            except:
+                self._db.execute('ROLLBACK')
+                raise
+            self._db.execute('COMMIT')
+
+    def clear(self):
+        """Removes all items. The counters are not reset."""
+        with self._lock:
+            self._db.execute('DELETE FROM cache')
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def stats(self):
+        """Returns the counters and the size as a dict."""
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self)}
+
+    def __repr__(self):
+        return '<{0} {1!r}>'.format(type(self).__name__, self.path)
+
+
+class TieredCache(object):
+    """A two-tier cache. The recently used items are kept in an
+    :class:`LRUCache` in front of a persistent store such as
+    :class:`SQLiteCache`. An item found in the store is kept in the memory
+    too. An item is set to both:
+
+        >>> cache = TieredCache(SQLiteCache('readings.db'), 1024)
+
+    :param store: the persistent store.
+    :param maxsize: the max number of items in the memory.
+
+    .. versionadded:: 0.1.10
+    """
+
+    def __init__(self, store, maxsize=1024):
+        self.memory = LRUCache(maxsize)
+        self.store = store
+
+    def __getitem__(self, key):
+        try:
+            return self.memory[key]
+        except KeyError:
+            pass
+        value = self.store[key]
+        self.memory[key] = value
+        return value
+
+    def __setitem__(self, key, value):
+        self.memory[key] = value
+        self.store[key] = value
+
+    def __contains__(self, key):
+        return key in self.memory or key in self.store
+
+    def __len__(self):
+        return len(self.store)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def set(self, key, value):
+        self[key] = value
+
+    def update(self, items):
+        """Sets the items from an iterable of key-value pairs. It is useful
+        to warm up the cache.
+        """
+        items = list(items)
+        self.store.update(items)
+        self.memory.update(items)
+
+    def resize(self, maxsize):
+        """Changes the max size of the memory."""
+        self.memory.resize(maxsize)
+
+    def clear(self):
+        self.memory.clear()
+        self.store.clear()
+
+    def stats(self):
+        """Returns the counters of the tiers and the hit rate of the whole
+        cache as a dict.
+        """
+        memory, store = self.memory.stats(), self.store.stats()
+        hits = memory['hits'] + store['hits']
+        lookups = memory['hits'] + memory['misses']
+        return {'memory': memory, 'store': store, 'hits': hits,
+                'misses': store['misses'],
+                'hit_rate': hits / lookups if lookups else 0.0}
+
+    def __repr__(self):
+        return '<{0} {1!r} in front of {2!r}>'.format(
+            type(self).__name__, self.memory, self.store)
@@ -0,0 +1,208 @@
+# -*- coding: utf-8 -*-
+"""
+    korean.data
+    ~~~~~~~~~~~
+
+    Loads allomorphic particles and number words from :file:`data.json`. The
+    data is loaded at the first lookup of a morpheme instead of at import
+    time. So importing :mod:`korean` stays cheap for the programs which don't
+    need the data.
+
+    The tables made from the data can be precomputed into a snapshot by
+    :func:`build_snapshot` or the command-line tool::
+
+       $ python -m korean snapshot
+
+    Then the snapshot is loaded by one read instead. It is ignored if it was
+    made from another :file:`data.json` or by another version.
+
+    .. versionadded:: 0.1.10
+
+    :copyright: (c) 2012-2013 by Heungsub Lee
+    :license: BSD, see LICENSE for more details.
+"""
+from __future__ import absolute_import, unicode_literals
+import os
+import threading
+
+
+__all__ = ['load', 'load_json', 'load_particles', 'load_snapshot',
+           'build_snapshot', 'ensure_loaded']
+
+
+#: The path of :file:`data.json`.
+DATA_PATH = os.path.join(os.path.dirname(__file__), 'data.json')
+
+#: The default path of the snapshot made by :func:`build_snapshot`.
+SNAPSHOT_PATH = os.path.join(os.path.dirname(__file__), 'data.pickle')
+
+#: The version of the snapshot format. Snapshots of other versions are
+#: ignored.
+SNAPSHOT_VERSION = 1
+
+#: ``True`` after the data has been loaded.
+loaded = False
+
+_lock = threading.RLock()
+_loading = False
+
+
+def load():
+    """Loads the data from the snapshot or :file:`data.json` if the snapshot
+    is missing or stale. Prefer :func:`ensure_loaded` which doesn't load the
+    data twice.
+    """
+    if not load_snapshot(SNAPSHOT_PATH):
+        load_json(DATA_PATH)
+
+
+def _register_particles(forms_list):
+    """Registers particles by each of their forms at once and returns them."""
+    from .morphology import Particle
+    particles, registry = [], {}
+    for forms in forms_list:
+        # type.__call__ skips looking up the registry by a single form
+        particle = type.__call__(Particle, *forms)
+        particles.append(particle)
+        for form in forms:
+            registry[form] = particle
+    Particle._index.update(registry)
+    return particles
+
+
+def _merge_under(table, items):
+    """Sets the items to the table except the keys which are set already.
+    The data is loaded at the first lookup so the entries set before it
+    should win.
+    """
+    for key, value in items:
+        table.setdefault(key, value)
+
+
+def load_json(path=DATA_PATH):
+    """Loads allomorphic particles and number words from :file:`data.json`."""
+    import io
+    import json
+    from .morphology import NumberWord
+    with io.open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    # register allomorphic particles
+    _register_particles(data['allomorphic_particles'].values())
+    # register numbers and digits
+    _merge_under(NumberWord.__numbers__,
+                 ((int(number), form)
+                  for number, form in data['numbers'].items()))
+    _merge_under(NumberWord.__digits__,
+                 ((int(digit), form)
+                  for digit, form in data['digits'].items()))
+    _merge_under(NumberWord.__unary_operations__,
+                 data['unary_operations'].items())
+
+
+def load_particles(path, encoding='utf-8'):
+    """Loads an extra particle dictionary and registers the particles over
+    the bundled ones. A ``.json`` file has a list of forms or a dict of them
+    such as ``allomorphic_particles`` in :file:`data.json`. Other files have
+    the forms of a particle per line separated by whitespace in the order of
+    :class:`korean.Particle` arguments. Lines starting with ``#`` are
+    ignored:
+
+    .. sourcecode:: text
+
+       # after a vowel, after a consonant, after Rieul
+       시여 이시여
+       로서는 으로서는 로서는
+
+    Returns the list of the registered particles.
+    """
+    import io
+    with io.open(path, 'r', encoding=encoding) as f:
+        if path.endswith('.json'):
+            import json
+            forms_list = json.load(f)
+            if isinstance(forms_list, dict):
+                forms_list = forms_list.get('allomorphic_particles',
+                                            forms_list).values()
+        else:
+            forms_list = [line.split() for line in f
+                          if line.strip() and not line.startswith('#')]
+    ensure_loaded()
+    return _register_particles(forms_list)
+
+
+def _checksum(path=DATA_PATH):
+    import hashlib
+    with open(path, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def load_snapshot(path=SNAPSHOT_PATH):
+    """Loads the tables from the snapshot. Returns ``False`` without loading
+    if the snapshot is missing, broken or stale.
+    """
+    import pickle
+    from .morphology import NumberWord, Particle
+    try:
+        with open(path, 'rb') as f:
+            snapshot = pickle.loads(f.read())
+        if snapshot['version'] != SNAPSHOT_VERSION or \
+           snapshot['checksum'] != _checksum():
+            return False
+        registry, particle_map = snapshot['particles']
+        numbers, digits, unary_operations, chunk_readings = \
+            snapshot['numbers']
+    except Exception:
+        return False
+    if Particle._index.revision:
+        # the precomputed map lacks the particles registered already
+        particle_map = None
+    Particle._index.update(registry, naive_map=particle_map)
+    if NumberWord.__numbers__ or NumberWord.__digits__:
+        # the precomputed readings lack the number words set already
+        chunk_readings = None
+    _merge_under(NumberWord.__numbers__, numbers.items())
+    _merge_under(NumberWord.__digits__, digits.items())
+    _merge_under(NumberWord.__unary_operations__, unary_operations.items())
+    NumberWord._chunk_readings = chunk_readings
+    return True
+
+
+def build_snapshot(path=SNAPSHOT_PATH):
+    """Writes the snapshot of the tables made from the data. The registered
+    particles are the source. So it should run in a fresh process which
+    hasn't registered other particles.
+    """
+    import pickle
+    from .morphology import NumberWord, Particle
+    ensure_loaded()
+    particle_map = Particle._index.naive_map()
+    chunk_readings = NumberWord._chunk_readings or \
+                     NumberWord._build_chunk_readings()
+    snapshot = {'version': SNAPSHOT_VERSION, 'checksum': _checksum(),
+                'particles': (dict(Particle._index.particles), particle_map),
+                'numbers': (dict(NumberWord.__numbers__),
+                            dict(NumberWord.__digits__),
+                            dict(NumberWord.__unary_operations__),
+                            chunk_readings)}
+    with open(path, 'wb') as f:
+        f.write(pickle.dumps(snapshot, 2))
+
+
+def ensure_loaded():
+    """Loads the data if it hasn't been loaded. The callers check
+    :data:`loaded` first to skip the call on hot paths::
+
+       if not data.loaded:
+           data.ensure_loaded()
+    """
+    global loaded, _loading
+    with _lock:
+        # registering particles looks up morphemes in the loading thread
+        if loaded or _loading:
+            return
+        _loading = True
+        try:
+            load()
+            loaded = True
+        finally:
+            _loading = False
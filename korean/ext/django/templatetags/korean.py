@@ -13,24 +13,119 @@
     :license: BSD, see LICENSE for more details.
 """
 from __future__ import absolute_import, unicode_literals
+import hashlib
+import json
 
 from django import template
+from django.conf import settings
+from django.template.base import TextNode, VariableNode
 from django.template.defaultfilters import stringfilter
+import six
 
 from .... import l10n
+from ....cache import LRUCache
 
 
 register = template.Library()
 
 
+#: The in-process cache for ``{% proofread cache %}``. It is used unless
+#: ``KOREAN_PROOFREAD_CACHE`` setting names a cache of Django's cache
+#: framework.
+proofread_cache = LRUCache(1024)
+
+
+def get_proofread_cache():
+    """Returns the cache for ``{% proofread cache %}``. The
+    ``KOREAN_PROOFREAD_CACHE`` setting is an alias in ``CACHES`` setting.
+    :data:`proofread_cache` is used if it is not set.
+
+    .. versionadded:: 0.1.10
+    """
+    alias = getattr(settings, 'KOREAN_PROOFREAD_CACHE', None)
+    if alias is None:
+        return proofread_cache
+    from django.core.cache import caches
+    return caches[alias]
+
+
 class ProofReadNode(template.Node):
+    """Renders the nodelist and proofreads the output.
+
+    If the nodelist consists of only text and variables, the text is proofread
+    at compile time. Then only the rendered variables and the naive particles
+    right after them are proofread at render time.
+
+    :param nodelist: the nodelist in the ``proofread`` tag.
+    :param cache: caches the proofread output.
+    :param cache_key: the :class:`django.template.base.FilterExpression`
+                      which is resolved to the cache key. If it is not given,
+                      the rendered content and the text of the block are
+                      hashed for the key.
 
-    def __init__(self, nodelist):
+    .. versionchanged:: 0.1.10
+       Added ``cache`` and ``cache_key`` arguments.
+    """
+
+    def __init__(self, nodelist, cache=False, cache_key=None):
         self.nodelist = nodelist
+        self.cache = cache
+        self.cache_key = cache_key
+        self.bits = self.precompile(nodelist)
+        # the same variables in other blocks make other output
+        chunks = None if self.bits is None else self.bits[1]
+        self.digest = hashlib.sha1(json.dumps(chunks).encode('utf-8'))
+
+    @staticmethod
+    def precompile(nodelist):
+        """Makes a tuple of the variable nodes and the chunks from
+        :meth:`korean.l10n.Proofreading.precompile` of the text around them.
+        Returns ``None`` if the nodelist contains any other node.
+        """
+        texts, variables = [''], []
+        for node in nodelist:
+            if isinstance(node, VariableNode):
+                variables.append(node)
+                texts.append('')
+            elif isinstance(node, TextNode):
+                texts[-1] += node.s
+            else:
+                return None
+        return tuple(variables), l10n.proofread.precompile(texts)
+
+    def render_parts(self, context):
+        """Renders the nodes which are not rendered at compile time."""
+        if self.bits is None:
+            return [self.nodelist.render(context)]
+        return [node.render(context) for node in self.bits[0]]
+
+    def proofread_parts(self, parts):
+        """Proofreads the parts from :meth:`render_parts`."""
+        if self.bits is None:
+            return l10n.proofread(parts[0])
+        parts = [six.text_type(part) for part in parts]
+        return l10n.proofread.render(self.bits[1], parts)
 
     def render(self, context):
-        output = self.nodelist.render(context)
-        return l10n.proofread(output)
+        if not self.cache:
+            return self.proofread_parts(self.render_parts(context))
+        cache = get_proofread_cache()
+        if self.cache_key is not None:
+            key = 'korean.proofread:key:%s' % self.cache_key.resolve(context)
+            parts = None
+        else:
+            parts = self.render_parts(context)
+            content = '\0'.join(map(six.text_type, parts)).encode('utf-8')
+            digest = self.digest.copy()
+            digest.update(content)
+            key = 'korean.proofread:%s' % digest.hexdigest()
+        output = cache.get(key)
+        if output is None:
+            if parts is None:
+                parts = self.render_parts(context)
+            output = self.proofread_parts(parts)
+            cache.set(key, output)
+        return output
 
 
 @register.tag(name='proofread')
@@ -45,10 +140,30 @@ def do_proofread(parser, token):
        {% proofread %}
          {{ name }}은(는) {{ obj }}을(를) 획득했다.
        {% endproofread %}
+
+    The output can be cached by ``cache`` argument. The cache key is the hash
+    of the rendered content or the given key:
+
+    .. sourcecode:: django
+
+       {% proofread cache %}...{% endproofread %}
+       {% proofread cache "greeting"|add:user.pk %}...{% endproofread %}
+
+    .. versionchanged:: 0.1.10
+       Added ``cache`` argument.
     """
+    bits = token.split_contents()
+    cache, cache_key = False, None
+    if len(bits) > 1:
+        if bits[1] != 'cache' or len(bits) > 3:
+            raise template.TemplateSyntaxError(
+                '%r tag takes only "cache" and an optional key' % bits[0])
+        cache = True
+        if len(bits) == 3:
+            cache_key = parser.compile_filter(bits[2])
     nodelist = parser.parse(['endproofread'])
     parser.delete_first_token()
-    return ProofReadNode(nodelist)
+    return ProofReadNode(nodelist, cache, cache_key)
 
 
 @register.filter
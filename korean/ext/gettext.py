@@ -16,10 +16,38 @@
 from __future__ import absolute_import, unicode_literals
 from functools import partial
 
+import six
+
 from ..l10n import Template
 
 
-def patch_gettext(translations):
+__all__ = ['patch_gettext', 'precompile_catalog']
+
+
+def precompile_catalog(translations):
+    """Makes :class:`korean.l10n.Template` objects for all messages in the
+    catalog of the given translations object and its fallbacks. Their format
+    strings are compiled up front. Returns a dict of the templates by the
+    messages.
+
+    .. versionadded:: 0.1.10
+    """
+    templates = {}
+    while translations is not None:
+        for message in six.itervalues(getattr(translations, '_catalog', {})):
+            if isinstance(message, six.text_type) and message not in templates:
+                template = Template(message)
+                try:
+                    template.compile()
+                except ValueError:
+                    # not a valid format string. it fails on format() only.
+                    pass
+                templates[message] = template
+        translations = getattr(translations, '_fallback', None)
+    return templates
+
+
+def patch_gettext(translations, precompile=False):
     """Patches Gettext translations object to wrap the result with
     :class:`korean.l10n.Template`. Then the result can work with a particle
     format spec.
@@ -49,15 +77,29 @@ def patch_gettext(translations):
         >>> _('{0} appears.').format(_('Christina'))
         '크리스티나가 나타났다.'
 
+    With ``precompile=True``, the whole catalog is compiled by
+    :func:`precompile_catalog` at once. Then the patched methods return the
+    same precompiled template for a message instead of parsing it on every
+    lookup. It moves the cost to the startup.
+
     :param translations: the Gettext translations object to be patched that
                          would refer the catalog for ko_KR.
+    :param precompile: compiles all messages in the catalog up front.
+
+    .. versionchanged:: 0.1.10
+       Added ``precompile`` argument.
     """
+    templates = precompile_catalog(translations) if precompile else {}
     methods_to_patch = ['gettext', 'ngettext']
     if hasattr(translations, 'ugettext'):
         methods_to_patch = ['u' + meth for meth in methods_to_patch]
     for meth in methods_to_patch:
         def patched(orig, *args, **kwargs):
-            return Template(orig(*args, **kwargs))
+            message = orig(*args, **kwargs)
+            try:
+                return templates[message]
+            except KeyError:
+                return Template(message)
         patched.__name__ = str(meth)
         orig = getattr(translations, meth)
         setattr(translations, meth, partial(patched, orig))
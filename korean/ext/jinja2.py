@@ -21,7 +21,15 @@ from __future__ import absolute_import, unicode_literals
 
 from jinja2 import nodes
 from jinja2.ext import Extension
-from jinja2.utils import Markup
+try:
+    from jinja2 import pass_context
+except ImportError:
+    from jinja2 import contextfunction as pass_context
+try:
+    from markupsafe import Markup, escape
+except ImportError:
+    from jinja2.utils import Markup, escape
+import six
 
 from .. import l10n
 
@@ -60,6 +68,13 @@ class ProofreadingExtension(Extension):
 
     .. versionchanged:: 0.1.6
        Added ``enabled`` argument to ``{% proofread %}``.
+
+    .. versionchanged:: 0.1.10
+       The template data in a ``proofread`` block is proofread at compile
+       time. Only the values of the expressions and the naive particles
+       right after them are proofread at runtime. A block containing other
+       statements such as ``{% for %}`` is still proofread entirely at
+       runtime.
     """
 
     tags = ['proofread', 'autoproofread']
@@ -70,16 +85,82 @@ class ProofreadingExtension(Extension):
     def _proofread(self, enabled, caller):
         return l10n.proofread(caller()) if enabled else caller()
 
+    @staticmethod
+    def _finalize(context, value):
+        """Applies the ``finalize`` function of the environment to the value
+        of an expression as Jinja2 does for ``{{ }}``.
+        """
+        finalize = context.environment.finalize
+        if finalize is None:
+            return value
+        pass_arg = getattr(getattr(finalize, 'jinja_pass_arg', None), 'name',
+                           None)
+        if pass_arg == 'context' or \
+           getattr(finalize, 'contextfunction', False):
+            return finalize(context, value)
+        elif pass_arg == 'eval_context' or \
+             getattr(finalize, 'evalcontextfunction', False):
+            return finalize(context.eval_ctx, value)
+        elif pass_arg == 'environment' or \
+             getattr(finalize, 'environmentfunction', False):
+            return finalize(context.environment, value)
+        return finalize(value)
+
+    @pass_context
+    def _render(self, context, chunks, *values, **kwargs):
+        """Renders the values of the expressions into the template data
+        which has been proofread by :meth:`_precompile`. It is called by an
+        empty call block whose output isn't finalized again. So ``caller`` in
+        the keyword arguments is ignored.
+        """
+        autoescape = context.eval_ctx.autoescape
+        texts = []
+        for value in values:
+            value = self._finalize(context, value)
+            if autoescape:
+                value = escape(value)
+            texts.append(six.text_type(value))
+        text = l10n.proofread.render(chunks, texts)
+        return Markup(text) if autoescape else text
+
+    def _precompile(self, body, lineno):
+        """Proofreads the template data in the body at compile time. The
+        body is replaced with a call to :meth:`_render` which proofreads only
+        the values of the expressions and the naive particles right after
+        them at runtime. See :meth:`korean.l10n.Proofreading.precompile`.
+        """
+        texts, exprs = [''], []
+        for node in body:
+            for item in node.nodes:
+                if isinstance(item, nodes.TemplateData):
+                    texts[-1] += item.data
+                else:
+                    exprs.append(item)
+                    texts.append('')
+        chunks = nodes.Const(l10n.proofread.precompile(texts))
+        call = self.call_method('_render', [chunks] + exprs)
+        return nodes.CallBlock(call, [], [], [], lineno=lineno)
+
     def parse(self, parser):
         tag = parser.stream.current.value
         lineno = next(parser.stream).lineno
         if parser.stream.current.type == 'block_end':
-            args = [nodes.Const(True)]
+            enabled = None
         else:
-            args = [parser.parse_expression()]
+            enabled = parser.parse_expression()
         body = parser.parse_statements(['name:end%s' % tag], drop_needle=True)
-        call = self.call_method('_proofread', args)
-        return nodes.CallBlock(call, [], [], body, lineno=lineno)
+        if not all(isinstance(node, nodes.Output) for node in body):
+            # statements such as {% for %} render text only at runtime
+            args = [nodes.Const(True) if enabled is None else enabled]
+            call = self.call_method('_proofread', args)
+            return nodes.CallBlock(call, [], [], body, lineno=lineno)
+        output = self._precompile(body, lineno)
+        if enabled is None:
+            return output
+        elif 'elif_' in nodes.If.fields:
+            return nodes.If(enabled, [output], [], body, lineno=lineno)
+        else:
+            return nodes.If(enabled, [output], body, lineno=lineno)
 
 
 # nicer import name
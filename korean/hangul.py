@@ -12,12 +12,19 @@
     :license: BSD, see LICENSE for more details.
 """
 from __future__ import unicode_literals
-
-from six.moves import xrange
+from itertools import product
+import sys
 
 __all__ = ['char_offset', 'is_hangul', 'is_vowel', 'is_consonant',
            'is_initial', 'is_final', 'get_initial', 'get_vowel', 'get_final',
-           'split_char', 'join_char']
+           'split_char', 'join_char', 'split_array', 'join_array']
+
+# Python 2's import seems to do not work with unicode __all__.
+if sys.version_info < (3,):
+    __all__ = map(str, __all__)
+# six is not imported to keep this module light
+if sys.version_info >= (3,):
+    xrange, unichr = range, chr
 
 
 def S(*sequences):
@@ -36,6 +43,18 @@ FIRST_HANGUL = HANGUL_RANGE[0]
 del S
 
 
+def _build_tables():
+    chars = [unichr(code) for code in HANGUL_RANGE]
+    splits = list(product(INITIALS, VOWELS, FINALS))
+    return tuple(splits), dict(zip(chars, splits)), dict(zip(splits, chars))
+#: ``(initial, vowel, final)`` of each Hangul character ordered by its offset.
+#: :data:`SPLIT_MAP` is the same table keyed by the character and
+#: :data:`JOIN_MAP` is the reverse of it.
+SPLIT_TABLE, SPLIT_MAP, JOIN_MAP = _build_tables()
+_VOWEL_SET, _CONSONANT_SET, _INITIAL_SET, _FINAL_SET = \
+    map(frozenset, (VOWELS, CONSONANTS, INITIALS, FINALS))
+
+
 def char_offset(char):
     """Returns Hangul character offset from "가"."""
     if isinstance(char, int):
@@ -50,58 +69,60 @@ def char_offset(char):
 
 def is_hangul(char):
     """Checks if the given character is written in Hangul."""
-    return ord(char) in HANGUL_RANGE
+    return char in SPLIT_MAP
 
 
 def is_vowel(char):
     """Checks if the given character is a vowel of Hangul."""
-    return char in VOWELS
+    return char in _VOWEL_SET
 
 
 def is_consonant(char):
     """Checks if the given character is a consonant of Hangul."""
-    return char in CONSONANTS
+    return char in _CONSONANT_SET
 
 
 def is_initial(char):
     """Checks if the given character is an initial consonant of Hangul."""
-    return char in INITIALS
+    return char in _INITIAL_SET
 
 
 def is_final(char):
     """Checks if the given character is a final consonant of Hangul. The final
     consonants contain what a joined multiple consonant and empty character.
     """
-    return char in FINALS
+    return char in _FINAL_SET
 
 
 def get_initial(char):
     """Returns an initial consonant from the given character."""
-    if is_initial(char):
+    if char in _INITIAL_SET:
         return char
-    return INITIALS[int(char_offset(char) / (len(VOWELS) * len(FINALS)))]
+    return split_char(char)[0]
 
 
 def get_vowel(char):
     """Returns a vowel from the given character."""
-    if is_vowel(char):
+    if char in _VOWEL_SET:
         return char
-    return VOWELS[int(char_offset(char) / len(FINALS)) % len(VOWELS)]
+    return split_char(char)[1]
 
 
 def get_final(char):
     """Returns a final consonant from the given character."""
-    if is_final(char):
+    if char in _FINAL_SET:
         return char
-    return FINALS[char_offset(char) % len(FINALS)]
+    return split_char(char)[2]
 
 
 def split_char(char):
     """Splits the given character to a tuple where the first item is the
     initial consonant and the second the vowel and the third the final.
     """
-    code = char_offset(char)
-    return (get_initial(code), get_vowel(code), get_final(code))
+    try:
+        return SPLIT_MAP[char]
+    except KeyError:
+        return SPLIT_TABLE[char_offset(char)]
 
 
 def join_char(splitted):
@@ -111,6 +132,72 @@ def join_char(splitted):
     assert len(splitted) == len(LETTER_ELEMENTS)
     if not (splitted[0] and splitted[1]):
         return splitted[0] or splitted[1]
-    indexes = [tuple.index(*args) for args in zip(LETTER_ELEMENTS, splitted)]
-    offset = (indexes[0] * len(VOWELS) + indexes[1]) * len(FINALS) + indexes[2]
-    return unichr(FIRST_HANGUL + offset)
+    try:
+        return JOIN_MAP[tuple(splitted)]
+    except KeyError:
+        raise ValueError('%r is not a Hangul syllable' % (splitted,))
+
+
+def _import_numpy():
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError('split_array and join_array need numpy')
+    return numpy
+
+
+def split_array(text):
+    """Splits all Hangul characters in the given text at once with NumPy. The
+    result is a tuple of three masked arrays. They have the indexes of the
+    initial consonants in :data:`INITIALS`, the vowels in :data:`VOWELS` and
+    the final consonants in :data:`FINALS`. Non-Hangul positions are masked:
+
+        >>> initials, vowels, finals = split_array('한글!')
+        >>> initials
+        masked_array(data=[18, 0, --], ...)
+
+    .. versionadded:: 0.1.10
+
+    :param text: a string or an array of code points.
+    """
+    numpy = _import_numpy()
+    if isinstance(text, unicode):
+        codes = numpy.frombuffer(text.encode('utf-32-le'), dtype='<u4')
+    else:
+        codes = numpy.asarray(text, dtype=numpy.uint32)
+    offsets = codes.astype(numpy.int64) - FIRST_HANGUL
+    mask = (offsets < 0) | (offsets >= len(HANGUL_RANGE))
+    offsets[mask] = 0
+    initials = offsets // (len(VOWELS) * len(FINALS))
+    vowels = offsets // len(FINALS) % len(VOWELS)
+    finals = offsets % len(FINALS)
+    return tuple(numpy.ma.masked_array(indexes.astype(numpy.uint8), mask)
+                 for indexes in (initials, vowels, finals))
+
+
+def join_array(initials, vowels, finals, fill=None):
+    """Joins the index arrays from :func:`split_array` to a string. Masked
+    positions are filled with the characters at the same positions in
+    ``fill``. If ``fill`` is not given, they are dropped:
+
+        >>> text = '한글!'
+        >>> join_array(*split_array(text), fill=text)
+        '한글!'
+
+    .. versionadded:: 0.1.10
+
+    :param fill: a string or an array of code points for masked positions.
+    """
+    numpy = _import_numpy()
+    indexes = [numpy.ma.getdata(x).astype(numpy.uint32)
+               for x in (initials, vowels, finals)]
+    mask = numpy.ma.getmaskarray(initials)
+    codes = FIRST_HANGUL + (indexes[0] * len(VOWELS) + indexes[1]) * \
+            len(FINALS) + indexes[2]
+    if fill is None:
+        codes = codes[~mask]
+    else:
+        if isinstance(fill, unicode):
+            fill = numpy.frombuffer(fill.encode('utf-32-le'), dtype='<u4')
+        codes[mask] = numpy.asarray(fill, dtype=numpy.uint32)[mask]
+    return codes.astype('<u4').tobytes().decode('utf-32-le')
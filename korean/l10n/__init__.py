@@ -12,12 +12,71 @@ from __future__ import absolute_import, unicode_literals
 from itertools import chain, product
 import re
 import six
+import string
+import sys
+import unicodedata
 import warnings
 
-from ..morphology import Noun, NumberWord, Particle, pick_allomorph
+from .. import data
+from ..cache import LRUCache
+from ..hangul import is_hangul
+from ..morphology import Noun, NumberWord, Particle, merge, pick_allomorph
+from ..morphology.substantive import ending_of_char
 
 
-__all__ = ['Proofreading', 'proofread', 'Template', 'patch_gettext']
+__all__ = ['ParticleScanner', 'Proofreading', 'proofread',
+           'proofread_stream', 'ParticleValidator', 'validate', 'Template',
+           'patch_gettext']
+
+# Python 2's import seems to do not work with unicode __all__.
+if sys.version_info < (3,):
+    __all__ = map(str, __all__)
+
+
+class ParticleScanner(object):
+    """Finds naive particles such as "을(를)" or "(으)로" in a single pass.
+
+    Every naive particle has one parenthesized allomorph. So the scanner looks
+    only for parenthesized words and dispatches each of them by a dict lookup
+    to the few naive particles sharing the word. The scanning speed doesn't
+    depend on how many particles are registered.
+
+    :param particle_map: a dict from naive particles to :class:`Particle`.
+
+    .. versionadded:: 0.1.10
+    """
+
+    def __init__(self, particle_map):
+        self.particle_map = particle_map
+        self.candidates = {}
+        for naive in particle_map:
+            left, right = naive.index('('), naive.index(')')
+            candidates = self.candidates.setdefault(naive[left + 1:right], [])
+            candidates.append((left, naive))
+        for candidates in six.itervalues(self.candidates):
+            # prefer the earliest and then the longest naive particle
+            candidates.sort(key=lambda x: (-x[0], -len(x[1])))
+        length = max(map(len, self.candidates)) if self.candidates else 1
+        self.pattern = re.compile(r'\(([^()]{1,%d})\)' % length)
+        #: The length of the longest naive particle.
+        self.length = max(map(len, particle_map)) if particle_map else 0
+
+    def finditer(self, text):
+        """Yields a tuple in the form of ``(start, end, particle)`` for each
+        naive particle in the given text.
+        """
+        prev_end = 0
+        for match in self.pattern.finditer(text):
+            try:
+                candidates = self.candidates[match.group(1)]
+            except KeyError:
+                continue
+            for left, naive in candidates:
+                start = match.start() - left
+                if start >= prev_end and text.startswith(naive, start):
+                    prev_end = start + len(naive)
+                    yield start, prev_end, self.particle_map[naive]
+                    break
 
 
 class Proofreading(object):
@@ -31,7 +90,21 @@ class Proofreading(object):
 
     def __init__(self, token_types):
         # TODO: support various token types
-        pass
+        self._index = None
+
+    def compile(self):
+        """Returns the :class:`ParticleScanner` for all naive particles. It is
+        built at the first call and reused until :meth:`Particle.register`
+        changes the registry.
+        """
+        if not data.loaded:
+            data.ensure_loaded()
+        revision = Particle._index.revision
+        if self._index is not None and self._index[0] == revision:
+            return self._index[1]
+        scanner = ParticleScanner(Particle._index.naive_map())
+        self._index = (revision, scanner)
+        return scanner
 
     def parse(self, text):
         """Tokenizes the given text with unicode text or :class:`Particle`.
@@ -39,26 +112,101 @@ class Proofreading(object):
         :param text: the string that has been written with naive particles.
         """
         tokens = []
-        naive_particles = []
-        particle_map = {}
-        for particle in set(Particle._registry.itervalues()):
-            for naive in particle.naive():
-                particle_map[naive] = particle
-                naive_particles.append(naive)
-        particle_pattern = '(%s)' % '|'.join(map(re.escape, naive_particles))
-        particle_pattern = re.compile(particle_pattern)
-        prev_span = [0, 0]
-        for match in particle_pattern.finditer(text):
-            span = match.span()
-            tokens.append(text[prev_span[1]:span[0]])
-            tokens.append(particle_map[match.group(1)])
-            prev_span = span
-        try:
-            tokens.append(text[span[1]:])
-        except UnboundLocalError:
-            tokens.append(text)
+        prev_end = 0
+        for start, end, particle in self.compile().finditer(text):
+            tokens.append(text[prev_end:start])
+            tokens.append(particle)
+            prev_end = end
+        tokens.append(text[prev_end:])
         return tuple(tokens)
 
+    def pick(self, particle, text):
+        """Picks the allomorph of the particle which follows the given text.
+        If it cannot be decided, the first naive form of the particle is
+        returned instead.
+
+        .. versionadded:: 0.1.10
+        """
+        try:
+            return pick_allomorph(particle, suffix_of=Noun(text))
+        except:
+            return particle.naive()[0]
+
+    def lookbehind(self, text):
+        """Returns the shortest tail of the given text which decides the
+        allomorph of a following particle. That is the last letter or the last
+        digits except punctuations and symbols.
+
+        .. versionadded:: 0.1.10
+        """
+        end = len(text)
+        while end and unicodedata.category(text[end - 1])[0] in 'PS':
+            end -= 1
+        start = end - 1
+        while start > 0 and text[start].isdigit() and \
+              text[start - 1].isdigit():
+            start -= 1
+        return text[max(start, 0):end]
+
+    def split_head(self, text):
+        """Splits the text which follows an unknown text into a tuple of the
+        head and the rest. The head is the leading naive particle with the
+        punctuations and symbols before it. That is the only part of the text
+        which cannot be proofread without the unknown text. The head is empty
+        if there's no such particle:
+
+            >>> proofread.split_head('"을(를)" 집(으)로')
+            ('"을(를)', '" 집(으)로')
+
+        .. versionadded:: 0.1.10
+        """
+        for start, stop, particle in self.compile().finditer(text):
+            if not self.lookbehind(text[:start]):
+                return text[:stop], text[stop:]
+            break
+        return '', text
+
+    def precompile(self, texts):
+        """Proofreads the texts separated by unknown values such as template
+        variables ahead of :meth:`render`. Returns a tuple of ``(head, text,
+        tail)`` for each text. The head is from :meth:`split_head` and the
+        text has been proofread. The tail is the :meth:`lookbehind` after the
+        text or ``None`` if it depends on the value before the text.
+
+        .. versionadded:: 0.1.10
+        """
+        chunks = []
+        for x, text in enumerate(texts):
+            head = ''
+            if x:
+                head, text = self.split_head(text)
+            if x and len(self.parse(text)) == 1:
+                # the lookbehind after it depends on the value before it
+                tail = None
+            else:
+                text, tail, _ = self._proofread_head('', text, len(text))
+            chunks.append((head, text, tail))
+        return tuple(chunks)
+
+    def render(self, chunks, values):
+        """Joins the chunks from :meth:`precompile` and the values between
+        them. The values and the heads of the chunks are proofread with the
+        text before them. The result is the same as proofreading the joined
+        text.
+
+        .. versionadded:: 0.1.10
+        """
+        head, text, context = chunks[0]
+        buf = [text]
+        for value, (head, text, tail) in zip(values, chunks[1:]):
+            value += head
+            value, context, _ = self._proofread_head(context, value,
+                                                     len(value))
+            buf.append(value)
+            buf.append(text)
+            context = self.lookbehind(context + text) if tail is None else tail
+        return ''.join(buf)
+
     def __call__(self, text):
         """Do proofread. More information in :class:`Proofreading`.
 
@@ -67,19 +215,170 @@ class Proofreading(object):
         buf = []
         for token in self.parse(text):
             if isinstance(token, Particle):
-                noun = Noun(buf[-1])
-                try:
-                    token = pick_allomorph(token, suffix_of=noun)
-                except:
-                    token = token.naive()[0]
+                token = self.pick(token, buf[-1])
             buf.append(token)
         return ''.join(buf)
 
+    def stream(self, chunks):
+        """Proofreads text incrementally. This generator consumes an iterable
+        of text chunks and yields the proofread text. Only a few characters
+        are kept between chunks. They are the tail of a chunk which might be
+        the beginning of a naive particle such as "(으" and the
+        :meth:`lookbehind` which decides the allomorph of a particle at the
+        head of the next chunk.
+
+            >>> ''.join(proofread.stream(['집(으', ')로 가자.']))
+            '집으로 가자.'
+
+        :param chunks: an iterable of strings written with naive particles.
+
+        .. versionadded:: 0.1.10
+        """
+        context = pending = ''
+        for chunk in chunks:
+            pending += chunk
+            # keep a possibly incomplete naive particle for the next chunk
+            end = len(pending) - self.compile().length + 1
+            if end <= 0:
+                continue
+            text, context, pending = self._proofread_head(context, pending,
+                                                          end)
+            if text:
+                yield text
+        text = self._proofread_head(context, pending, len(pending))[0]
+        if text:
+            yield text
+
+    def _proofread_head(self, context, text, end):
+        """Proofreads the head of the text until the given end and returns a
+        tuple of the proofread head, the next context, and the rest text. The
+        naive particles starting before the end are proofread completely.
+        """
+        buf = []
+        prev_end = 0
+        for start, stop, particle in self.compile().finditer(text):
+            if start >= end:
+                break
+            buf.append(text[prev_end:start])
+            buf.append(self.pick(particle, context + text[prev_end:start]))
+            context, prev_end = '', stop
+        end = max(end, prev_end)
+        buf.append(text[prev_end:end])
+        context = self.lookbehind(context + text[prev_end:end])
+        return ''.join(buf), context, text[end:]
+
 
 #: Default :class:`Proofreading` object. It tokenizes ``unicode`` and
 #: :class:`korean.Particle`. Use it like a function.
 proofread = Proofreading([six.text_type, Particle])
 
+#: Proofreads an iterable of text chunks with the default
+#: :class:`Proofreading` object. See :meth:`Proofreading.stream`.
+proofread_stream = proofread.stream
+
+
+class ParticleValidator(object):
+    """Finds particles which don't agree with the syllable before them such
+    as "사과을" which should be "사과를". Only the particle forms which rarely
+    end other words are checked. They should be at the end of a Hangul word.
+
+        >>> list(validate.finditer('사과을 먹었다.'))
+        [(2, 3, '사과을', '를')]
+
+    :param forms: the particle forms to check.
+    :param exceptions: the words which end with one of the forms but are not
+                       followed by a particle such as "가을".
+
+    .. versionadded:: 0.1.10
+    """
+
+    #: The default particle forms to check.
+    forms = ('를', '을', '와', '으로')
+
+    #: The default words ending with one of the forms without a particle.
+    exceptions = frozenset(['가을', '마을', '노을', '고을', '이을', '지을',
+                            '나을', '부을', '그을', '저을'])
+
+    def __init__(self, forms=None, exceptions=None):
+        if forms is not None:
+            self.forms = tuple(forms)
+        if exceptions is not None:
+            self.exceptions = frozenset(exceptions)
+        self._index = None
+
+    def compile(self):
+        """Returns a tuple of the compiled pattern and a dict from the forms
+        to the allomorphs by the ending class. It is rebuilt when
+        :meth:`Particle.register` changes the registry.
+        """
+        if not data.loaded:
+            data.ensure_loaded()
+        revision = Particle._index.revision
+        if self._index is not None and self._index[0] == revision:
+            return self._index[1]
+        allomorphs = {}
+        for form in self.forms:
+            particle = Particle.get(form)
+            allomorphs[form] = tuple(particle.pick_allomorph_after_ending(x)
+                                     for x in range(3))
+        forms = sorted(self.forms, key=len, reverse=True)
+        pattern = re.compile('([\uac00-\ud7a3]*)([\uac00-\ud7a3])(%s)'
+                             '(?![\uac00-\ud7a3])' % '|'.join(forms))
+        self._index = (revision, (pattern, allomorphs))
+        return self._index[1]
+
+    def finditer(self, text):
+        """Yields tuples of the start and the end of the wrong particle, the
+        word containing it and the correct allomorph.
+        """
+        pattern, allomorphs = self.compile()
+        for match in pattern.finditer(text):
+            form = match.group(3)
+            expected = allomorphs[form][ending_of_char(match.group(2))]
+            if expected == form:
+                continue
+            word = match.group(0)
+            if word[-3:] in self.exceptions or word[-2:] in self.exceptions:
+                continue
+            yield match.start(3), match.end(3), word, expected
+
+    def __call__(self, text):
+        """Returns a list of the results of :meth:`finditer`."""
+        return list(self.finditer(text))
+
+
+#: Default :class:`ParticleValidator` object.
+validate = ParticleValidator()
+
+
+def _substantive(val):
+    """Wraps a string with :class:`Noun` and an integer with
+    :class:`NumberWord`. Otherwise returns the value as it is.
+    """
+    if isinstance(val, six.text_type):
+        return Noun(val)
+    elif isinstance(val, six.integer_types):
+        return NumberWord(int(val))
+    return val
+
+
+class _TemplateFormatter(string.Formatter):
+    """Resolves fields of :class:`Template` with substantives."""
+
+    def get_value(self, key, args, kwargs):
+        val = super(_TemplateFormatter, self).get_value(key, args, kwargs)
+        return _substantive(val)
+
+    def convert_field(self, value, conversion):
+        # str() of a morpheme is UTF-8 bytes on Python 2
+        if conversion == 's':
+            return six.text_type(value)
+        return super(_TemplateFormatter, self).convert_field(value,
+                                                             conversion)
+
+
+_formatter = _TemplateFormatter()
+
 
 class Template(six.text_type):
     """The :class:`Template` object extends :class:`unicode` and overrides
@@ -97,17 +396,86 @@ class Template(six.text_type):
         >>> import korean
         >>> '{0:을 좋아합니다.}'.format(korean.Noun('향수'))
         '향수를 좋아합니다.'
+
+    .. versionchanged:: 0.1.10
+       The format string is parsed only once into a plan. See
+       :meth:`compile`.
     """
 
+    #: The :class:`korean.cache.LRUCache` of the plans by format strings.
+    plan_cache = LRUCache(4096)
+
+    def compile(self):
+        """Parses the format string into a plan and caches it. The plan is a
+        tuple of literal strings and fields. Each field is a tuple in the form
+        of ``(field_name, conversion, spec, particle, particle_spec)``. The
+        particle of a particle format spec such as ``{0:을}`` is resolved
+        here. The template object keeps its plan even after it is evicted
+        from :attr:`plan_cache`. ``None`` is returned for a format string
+        which the plan doesn't cover such as nested fields in a format spec.
+
+        .. versionadded:: 0.1.10
+        """
+        key = six.text_type(self)
+        compiled = getattr(self, '_compiled', None) or self.plan_cache.get(key)
+        if compiled is not None and compiled[0] == Particle._index.revision:
+            self._compiled = compiled
+            return compiled[1]
+        plan = []
+        auto_number, manual = 0, False
+        for literal, field_name, spec, conversion in _formatter.parse(key):
+            if literal:
+                plan.append(literal)
+            if field_name is None:
+                continue
+            if '{' in spec:
+                plan = None
+                break
+            if not field_name or field_name[0] in '.[':
+                field_name = '%d%s' % (auto_number, field_name)
+                auto_number += 1
+            else:
+                manual = True
+            particle = particle_spec = None
+            separated_spec = spec.split(':', 1)
+            if separated_spec[0] and is_hangul(separated_spec[0][0]):
+                particle = Particle(separated_spec.pop(0))
+                particle_spec = separated_spec[0] if separated_spec else ''
+            plan.append((field_name, conversion, spec,
+                         particle, particle_spec))
+        if plan is not None and manual and auto_number:
+            # let str.format raise the error of mixed field numbering
+            plan = None
+        if plan is not None:
+            plan = tuple(plan)
+        # resolved particles are stale after the registry changes
+        compiled = (Particle._index.revision, plan)
+        self._compiled = self.plan_cache[key] = compiled
+        return plan
+
     def format(self, *args, **kwargs):
-        args = list(args)
-        for seq, (key, val) in chain(product([args], enumerate(args)),
-                                     product([kwargs], kwargs.items())):
-            if isinstance(val, six.text_type):
-                seq[key] = Noun(val)
-            elif isinstance(val, (long, int)):
-                seq[key] = NumberWord(int(val))
-        return super(Template, self).format(*args, **kwargs)
+        plan = self.compile()
+        if plan is None:
+            args = list(args)
+            for seq, (key, val) in chain(product([args], enumerate(args)),
+                                         product([kwargs], kwargs.items())):
+                seq[key] = _substantive(val)
+            return super(Template, self).format(*args, **kwargs)
+        buf = []
+        for step in plan:
+            if isinstance(step, six.text_type):
+                buf.append(step)
+                continue
+            field_name, conversion, spec, particle, particle_spec = step
+            obj = _formatter.get_field(field_name, args, kwargs)[0]
+            if conversion:
+                obj = _formatter.convert_field(obj, conversion)
+            if particle is not None and type(obj) is Noun:
+                # pick the allomorph here without parsing the spec again
+                buf.append(format(merge(obj, particle), particle_spec))
+            else:
+                buf.append(format(obj, spec))
+        return ''.join(buf)
 
     def __repr__(self):
         return '<%s %s>' % \
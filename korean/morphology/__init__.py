@@ -8,44 +8,88 @@
 """
 from __future__ import absolute_import, unicode_literals
 import sys
-import types
+import threading
 
 from .. import hangul
 
 
-__all__ = ['Morphology', 'Morpheme', 'Particle', 'Substantive', 'Noun',
-           'NumberWord', 'Loanword', 'pick_allomorph', 'merge',
-           'define_allomorph_picker']
+__all__ = ['Morphology', 'Morpheme', 'Particle', 'ParticleIndex',
+           'Substantive', 'Noun', 'NumberWord', 'Loanword', 'pick_allomorph',
+           'find_allomorph_picker', 'merge', 'define_allomorph_picker',
+           'VOWEL_ENDING', 'CONSONANT_ENDING', 'RIEUL_ENDING']
+
+# Python 2's import seems to do not work with unicode __all__.
+if sys.version_info < (3,):
+    __all__ = map(str, __all__)
 
 
 class Morphology(object):
+    """The rules between morphemes such as allomorph pickers.
+
+    .. versionchanged:: 0.1.10
+       The registry is copy-on-write. It is replaced with an updated copy
+       under :attr:`_lock` and never changed after that. So it is read
+       without a lock in threads. Allomorph pickers are dispatched by
+       :attr:`_pickers`.
+    """
 
+    #: The rules by their kinds such as ``'allomorph_pickers'``.
     _registry = {}
 
+    #: The dispatch tables of allomorph pickers for prefixes and suffixes.
+    #: Each of them is a dict from ``(morpheme type, neighbor type)`` to the
+    #: function. They are made from the registry.
+    _pickers = ({}, {})
+
+    #: The lock for replacing the registry.
+    _lock = threading.Lock()
+
     @classmethod
     def _register_morpheme(cls, morpheme_cls):
-        for attr in dir(morpheme_cls):
-            if not attr.startswith('$'):
-                continue
-            for keyword, func in getattr(morpheme_cls, attr):
-                keyword = (morpheme_cls,) + keyword
-                if keyword in cls._registry:
+        # collect rules from the bases first to let subclasses override them
+        rules = {}
+        for base in reversed(morpheme_cls.__mro__):
+            for func in list(vars(base).values()):
+                for attr, keyword in getattr(func, '_morphology_rules', ()):
+                    keyword = (morpheme_cls,) + keyword
+                    rules.setdefault(attr, {})[keyword] = func
+        if not rules:
+            return
+        with cls._lock:
+            registry = dict(cls._registry)
+            for attr, funcs in rules.items():
+                registered = registry.get(attr, {})
+                if any(keyword in registered for keyword in funcs):
                     raise ValueError('Already defined rule')
-                try:
-                    cls._registry[attr][keyword] = func
-                except KeyError:
-                    cls._registry[attr] = {keyword: func}
+                registered = dict(registered)
+                registered.update(funcs)
+                registry[attr] = registered
+            cls._pickers = cls._make_pickers(registry.get('allomorph_pickers',
+                                                          {}))
+            cls._registry = registry
+
+    @staticmethod
+    def _make_pickers(rules):
+        prefix_pickers, suffix_pickers = {}, {}
+        for (morpheme_type, prefix_of, suffix_of), func in rules.items():
+            if prefix_of:
+                prefix_pickers[morpheme_type, prefix_of] = func
+            else:
+                suffix_pickers[morpheme_type, suffix_of] = func
+        return prefix_pickers, suffix_pickers
 
     @classmethod
-    def _make_decorator(cls, tmp_attr, keyword):
-        assert tmp_attr.startswith('$')
-        frm = sys._getframe(2)
+    def _make_decorator(cls, attr, keyword):
+        """Makes a decorator which marks the function with a rule. The rule
+        is registered when the class is created.
+
+        .. versionchanged:: 0.1.10
+           Rules are kept in the function attributes instead of the local
+           namespace of the class body.
+        """
         def decorator(func):
-            rule = (keyword, func)
-            try:
-                frm.f_locals[tmp_attr].append(rule)
-            except KeyError:
-                frm.f_locals[tmp_attr] = [rule]
+            rules = getattr(func, '_morphology_rules', [])
+            func._morphology_rules = rules + [(attr, keyword)]
             return func
         return decorator
 
@@ -56,27 +100,45 @@ class Morphology(object):
         elif bool(prefix_of) == bool(suffix_of):
             raise TypeError('Cannot specify prefix_of and suffix_of both')
         keyword = (prefix_of, suffix_of)
-        return cls._make_decorator('$allomorph_pickers', keyword)
+        return cls._make_decorator('allomorph_pickers', keyword)
+
+    @classmethod
+    def find_allomorph_picker(cls, morpheme, prefix_of=None,
+                              suffix_of=None):
+        """Returns the function which picks an allomorph of the morpheme by
+        the neighbor. It is called with the morpheme and the neighbor. Returns
+        ``None`` if there's no such rule.
+
+        .. versionadded:: 0.1.10
+        """
+        if prefix_of:
+            return cls._pickers[0].get((type(morpheme), type(prefix_of)))
+        elif suffix_of:
+            return cls._pickers[1].get((type(morpheme), type(suffix_of)))
 
     @classmethod
     def pick_allomorph(cls, morpheme, prefix_of=None, suffix_of=None):
-        prefix_type = prefix_of and type(prefix_of)
-        suffix_type = suffix_of and type(suffix_of)
-        keyword = (type(morpheme), prefix_type, suffix_type)
-        func = cls._registry['$allomorph_pickers'][keyword]
-        bound_func = types.MethodType(func, morpheme)
-        return bound_func(prefix_of or suffix_of)
+        func = cls.find_allomorph_picker(morpheme, prefix_of, suffix_of)
+        if func is None:
+            raise KeyError((type(morpheme), prefix_of and type(prefix_of),
+                            suffix_of and type(suffix_of)))
+        return func(morpheme, prefix_of or suffix_of)
 
     @classmethod
     def merge(cls, prefix, suffix):
-        try:
-            prefix = cls.pick_allomorph(prefix, prefix_of=suffix)
-        except KeyError:
-            pass
-        try:
-            suffix = cls.pick_allomorph(suffix, suffix_of=prefix)
-        except KeyError:
-            pass
+        """Merges a prefix and a suffix after picking their allomorphs by
+        each other.
+
+        .. versionchanged:: 0.1.10
+           Doesn't raise :exc:`KeyError` internally when there's no rule.
+        """
+        prefix_pickers, suffix_pickers = cls._pickers
+        func = prefix_pickers.get((type(prefix), type(suffix)))
+        if func is not None:
+            prefix = func(prefix, suffix)
+        func = suffix_pickers.get((type(suffix), type(prefix)))
+        if func is not None:
+            suffix = func(suffix, prefix)
         if hangul.is_final(suffix[0]):
             prefix = prefix.read()
             splitted = hangul.split_char(prefix[-1])
@@ -88,11 +150,13 @@ class Morphology(object):
 
 
 pick_allomorph = Morphology.pick_allomorph
+find_allomorph_picker = Morphology.find_allomorph_picker
 define_allomorph_picker = Morphology.define_allomorph_picker
 merge = Morphology.merge
 
 
 #: Imports submodules on the end. Because they might need :class:`Morphology`.
 from .morpheme import Morpheme
-from .particle import Particle
-from .substantive import Substantive, Noun, NumberWord, Loanword
+from .particle import Particle, ParticleIndex
+from .substantive import (Substantive, Noun, NumberWord, Loanword,
+                          VOWEL_ENDING, CONSONANT_ENDING, RIEUL_ENDING)
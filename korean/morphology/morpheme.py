@@ -8,9 +8,11 @@
 """
 from __future__ import absolute_import, unicode_literals
 import sys
+import threading
 
 import six
 
+from .. import data
 from ..hangul import get_final, is_hangul
 
 
@@ -43,23 +45,45 @@ class Morpheme(object):
 
     :param forms: each forms of allomorph. the first form will be basic
                   allomorph.
+
+    .. versionchanged:: 0.1.10
+       Morpheme classes define ``__slots__`` to keep instances compact.
+       Subclasses should define ``__slots__`` too. The registry is
+       copy-on-write. :meth:`register` replaces it with an updated copy under
+       :attr:`_lock`. So :meth:`get` doesn't need a lock in threads.
     """
 
+    __slots__ = ('forms',)
+
     _registry = None
 
+    #: The lock for replacing the registries of morpheme classes.
+    _lock = threading.Lock()
+
     def __init__(self, *forms):
         assert all([isinstance(form, six.text_type) for form in forms])
         self.forms = forms
 
     @classmethod
     def get(cls, key):
-        """Returns a pre-defined morpheme object by the given key."""
+        """Returns a pre-defined morpheme object by the given key. The data is
+        loaded at the first call.
+        """
+        if not data.loaded:
+            data.ensure_loaded()
         return cls._registry[key]
 
     @classmethod
     def register(cls, key, obj):
-        """Registers a pre-defined morpheme object to the given key."""
-        cls._registry[key] = obj
+        """Registers a pre-defined morpheme object to the given key. The data
+        is loaded first not to be overwritten by it.
+        """
+        if not data.loaded:
+            data.ensure_loaded()
+        with cls._lock:
+            registry = dict(cls._registry)
+            registry[key] = obj
+            cls._registry = registry
 
     def read(self):
         """Every morpheme class would implement this method. They should make a
@@ -7,23 +7,148 @@
     :license: BSD, see LICENSE for more details.
 """
 from __future__ import absolute_import, unicode_literals
-import unicodedata
+import threading
 
 from . import define_allomorph_picker
+from .. import data
+from ..cache import LRUCache
 from .morpheme import Morpheme
-from .substantive import Noun, NumberWord, Loanword
-from .. import hangul
+from .substantive import Noun, NumberWord, Loanword, ending_of_char
 
 
-__all__ = ['Particle']
+__all__ = ['Particle', 'ParticleIndex']
+
+
+class ParticleIndex(object):
+    """The registry of particles by their forms. It also derives the indices
+    for :meth:`Particle.guess` and the naive particle map for proofreading
+    from the same registry. The derived indices are built on demand and kept
+    until the registry changes. So a lookup doesn't depend on how many
+    particles are registered.
+
+    The registry and the indices are published together as a snapshot which
+    is never changed. Registering makes a new snapshot under a lock and
+    swaps it at once. So lookups in threads don't need a lock and never see
+    a half-updated registry.
+
+    :param particles: the dict of particles to be registered.
+
+    .. versionadded:: 0.1.10
+    """
+
+    #: The max number of the guessed particles kept for each snapshot.
+    guess_cache_size = 1024
+
+    def __init__(self, particles=None):
+        self._lock = threading.Lock()
+        # the revision, the registered particles, the registered key lengths
+        # from the longest, the cache of guessed particles by keys and the
+        # naive particle map
+        self._snapshot = self._make_snapshot(0, dict(particles or {}))
+
+    def _make_snapshot(self, revision, particles, naive_map=None):
+        lengths = tuple(sorted(set(map(len, particles)), reverse=True))
+        guessed = LRUCache(self.guess_cache_size)
+        return [revision, particles, lengths, guessed, naive_map]
+
+    @property
+    def revision(self):
+        """Increased whenever the registry changes. Caches built from the
+        registry such as the proofreading pattern compare it to know when
+        they are stale.
+        """
+        return self._snapshot[0]
+
+    @property
+    def particles(self):
+        """The registered particles by their forms. Don't change it."""
+        return self._snapshot[1]
+
+    def register(self, key, particle):
+        """Registers a particle to the given key."""
+        self.update({key: particle})
+
+    def update(self, particles, naive_map=None):
+        """Registers the particles in the dict at once.
+
+        :param naive_map: the precomputed naive particle map of the updated
+                          registry.
+        """
+        with self._lock:
+            revision, registered = self._snapshot[:2]
+            registered = dict(registered)
+            registered.update(particles)
+            self._snapshot = self._make_snapshot(revision + 1, registered,
+                                                 naive_map)
+
+    def get(self, key):
+        """Returns the registered particle or guesses it."""
+        snapshot = self._snapshot
+        try:
+            return snapshot[1][key]
+        except KeyError:
+            return self._guess(snapshot, key)
+
+    def guess(self, key):
+        """Guesses a particle from the registered particle which is the
+        longest prefix of the given key. The recently guessed particles are
+        kept until the registry changes. Raises :exc:`KeyError` if there's no
+        such particle.
+        """
+        return self._guess(self._snapshot, key)
+
+    def _guess(self, snapshot, key):
+        _, particles, lengths, guessed, _ = snapshot
+        try:
+            particle = guessed[key]
+        except KeyError:
+            particle = None
+            for length in lengths:
+                try:
+                    prefix = particles[key[:length]]
+                except KeyError:
+                    continue
+                suffix = key[length:]
+                # type.__call__ skips looking up the registry by a single
+                # form which would guess it again
+                forms = [form + suffix for form in prefix.forms]
+                particle = type.__call__(type(prefix), *forms)
+                break
+            # another thread might have guessed it first
+            particle = guessed.setdefault(key, particle)
+        if particle is None:
+            raise KeyError('There is no guessable particle')
+        return particle
+
+    def naive_map(self):
+        """Returns a dict from the naive particles such as "을(를)" to the
+        registered particles.
+        """
+        snapshot = self._snapshot
+        if snapshot[4] is None:
+            naive_map = {}
+            for particle in set(snapshot[1].values()):
+                for naive in particle.naive():
+                    naive_map[naive] = particle
+            snapshot[4] = naive_map
+        return snapshot[4]
 
 
 class Particle(Morpheme):
     """Particle (조사) is a postposition in Korean. Some particles have
     different allomorphs such as 을/를, 이/가. These forms follow forward
     syllable ends what phoneme; a vowel, a consonant, or a Rieul (ㄹ).
+
+    .. versionchanged:: 0.1.10
+       The registry is managed by :class:`ParticleIndex` at :attr:`_index`.
     """
 
+    __slots__ = ()
+
+    #: The :class:`ParticleIndex` of the registry. It is set after the class
+    #: is created.
+    _index = None
+
     def __init__(self, after_vowel, after_consonant=None, after_rieul=None):
         if after_rieul:
             forms = (after_vowel, after_consonant, after_rieul)
@@ -35,20 +160,36 @@ class Particle(Morpheme):
 
     @classmethod
     def get(cls, key):
-        try:
-            return super(Particle, cls).get(key)
-        except KeyError:
-            return cls.guess(key)
+        if not data.loaded:
+            data.ensure_loaded()
+        return cls._index.get(key)
+
+    @classmethod
+    def register(cls, key, obj):
+        # load the data first not to be overwritten by it
+        if not data.loaded:
+            data.ensure_loaded()
+        cls._index.register(key, obj)
 
     @classmethod
     def guess(cls, key):
-        length_of_first = lambda x: len(x[0])
-        for other_key, particle in sorted(cls._registry.items(),
-                                          key=length_of_first):
-            if key.startswith(other_key):
-                suffix = key[len(other_key):]
-                return cls(*(form + suffix for form in particle.forms))
-        raise KeyError('There is no guessable particle')
+        """Guesses a particle from the registered particle which is the
+        longest prefix of the given key. For example, "으로부터" is guessed
+        from "으로". The recently guessed particles are shared by the key
+        until :meth:`register` changes the registry:
+
+            >>> Particle.guess('으로부터').forms
+            ('로부터', '으로부터', '로부터')
+            >>> Particle.guess('으로부터') is Particle('으로부터')
+            True
+
+        .. versionchanged:: 0.1.10
+           Uses the longest prefix instead of the shortest one. And guessed
+           particles are shared.
+        """
+        if not data.loaded:
+            data.ensure_loaded()
+        return cls._index.guess(key)
 
     @property
     def after_vowel(self):
@@ -88,24 +229,23 @@ class Particle(Morpheme):
                 rv.append('({0}){1}'.format(*args))
         return tuple(rv)
 
+    def pick_allomorph_after_ending(self, ending):
+        """Picks an allomorph by the ending class such as
+        :data:`korean.morphology.VOWEL_ENDING`.
+
+        .. versionadded:: 0.1.10
+        """
+        return (self.after_vowel, self.after_consonant,
+                self.after_rieul)[ending]
+
     def pick_allomorph_after_char(self, char):
-        final = hangul.get_final(char)
-        if not final:
-            return self.after_vowel
-        elif final == 'ㄹ':
-            return self.after_rieul
-        else:
-            return self.after_consonant
+        return self.pick_allomorph_after_ending(ending_of_char(char))
 
     @define_allomorph_picker(suffix_of=Noun)
     @define_allomorph_picker(suffix_of=NumberWord)
     @define_allomorph_picker(suffix_of=Loanword)
     def pick_allomorph_after_substantive(self, substantive):
-        reading = substantive.read()
-        for char in reversed(reading):
-            cat = unicodedata.category(char)
-            if cat[0] == 'P' or cat[0] == 'S':
-                # skip punctuations and symbols
-                continue
-            return self.pick_allomorph_after_char(char)
-        raise AssertionError()
+        return self.pick_allomorph_after_ending(substantive.ending())
+
+
+Particle._index = ParticleIndex()
@@ -7,20 +7,117 @@
     :license: BSD, see LICENSE for more details.
 """
 from __future__ import absolute_import, unicode_literals
-from collections import deque
 import itertools
+import pickle
 import re
+import unicodedata
+
+import six
 
 from .morpheme import Morpheme
-from ..hangul import is_hangul
+from .. import data
+from ..cache import LRUCache
+from ..hangul import get_final, is_hangul
+
+
+__all__ = ['Substantive', 'Noun', 'NumberWord', 'Loanword', 'VOWEL_ENDING',
+           'CONSONANT_ENDING', 'RIEUL_ENDING', 'ending_of_char', 'ending_of']
+
+
+#: Ending classes of the last syllable. A particle picks an allomorph by them.
+#: They are also the indexes of particle forms.
+VOWEL_ENDING, CONSONANT_ENDING, RIEUL_ENDING = range(3)
+
+
+#: The :mod:`hangulize` module imported by :class:`Loanword` at the first
+#: use.
+_hangulize = None
 
 
-__all__ = ['Substantive', 'Noun', 'NumberWord', 'Loanword']
+def ending_of_char(char):
+    """Returns the ending class of the given Hangul character."""
+    final = get_final(char)
+    if not final:
+        return VOWEL_ENDING
+    elif final == 'ㄹ':
+        return RIEUL_ENDING
+    else:
+        return CONSONANT_ENDING
+
+
+def ending_of(reading):
+    """Returns the ending class of the last syllable in the given reading.
+    Punctuations and symbols are skipped.
+    """
+    for char in reversed(reading):
+        cat = unicodedata.category(char)
+        if cat[0] == 'P' or cat[0] == 'S':
+            # skip punctuations and symbols
+            continue
+        return ending_of_char(char)
+    raise AssertionError()
 
 
 class Substantive(Morpheme):
     """A class for Korean substantive that is called "체언" in Korean."""
 
+    __slots__ = ()
+
+    #: The :class:`korean.cache.LRUCache` of ending classes.
+    ending_cache = LRUCache(4096)
+
+    #: Ending classes made by :meth:`precompute_endings`. They are never
+    #: evicted.
+    _endings = {}
+
+    def _key(self):
+        """The hashable key which identifies the reading."""
+        return six.text_type(self)
+
+    def ending(self):
+        """Returns the ending class of the last pronounceable syllable;
+        :data:`VOWEL_ENDING`, :data:`CONSONANT_ENDING` or
+        :data:`RIEUL_ENDING`. It reads the substantive only at the first time.
+
+            >>> Noun('레벨 42').ending() == VOWEL_ENDING
+            True
+
+        .. versionadded:: 0.1.10
+        """
+        key = (type(self), self._key())
+        try:
+            return self._endings[key]
+        except KeyError:
+            pass
+        try:
+            return self.ending_cache[key]
+        except KeyError:
+            pass
+        ending = ending_of(self.read())
+        self.ending_cache[key] = ending
+        return ending
+
+    @classmethod
+    def precompute_endings(cls, words):
+        """Computes the ending classes of the whole vocabulary up front. Then
+        :meth:`ending` never reads them again. The words which don't end with
+        Hangul are skipped:
+
+            >>> Noun.precompute_endings(['용사', '검', '마법서'])
+            >>> NumberWord.precompute_endings(range(100))
+
+        :param words: substantives or arguments to make substantives.
+        """
+        for word in words:
+            if not isinstance(word, Substantive):
+                word = cls(word)
+            try:
+                ending = ending_of(word.read())
+            except AssertionError:
+                # not decidable such as a word written in alphabets
+                continue
+            Substantive._endings[(type(word), word._key())] = ending
+
     def __format__(self, spec):
         """:class:`Substantive`'s custom formatter appends the correct particle
         after the substantive string using particle format spec such as
@@ -50,30 +147,51 @@ class Substantive(Morpheme):
 class Noun(Substantive):
     """A class for Korean noun that is called "명사" in Korean."""
 
+    __slots__ = ()
+
     READING_PATTERN = re.compile(r'(?P<other>[^0-9]+)?(?P<number>[0-9]+)?')
 
+    #: The :class:`korean.cache.LRUCache` of readings by nouns. Resize it by
+    #: ``Noun.reading_cache.resize(maxsize)``.
+    reading_cache = LRUCache(4096)
+
     def read(self):
         """Reads a noun as Korean. The result will be Hangul.
 
             >>> Noun('레벨42').read()
             '레벨사십이'
         """
+        text = six.text_type(self)
+        try:
+            return self.reading_cache[text]
+        except KeyError:
+            pass
         rv = []
-        for match in self.READING_PATTERN.finditer(unicode(self)):
+        for match in self.READING_PATTERN.finditer(text):
             if match.group('other'):
                 rv.append(match.group('other'))
             if match.group('number'):
                 rv.append(NumberWord(int(match.group('number'))).read())
-        return ''.join(rv)
+        rv = ''.join(rv)
+        self.reading_cache[text] = rv
+        return rv
 
 
 class NumberWord(Substantive):
     """A class for Korean number word that is called "수사" in Korean."""
 
+    __slots__ = ('number',)
+
     __numbers__ = {}
     __digits__ = {}
     __unary_operations__ = {}
 
+    #: The readings of 0 to 9999. It is built at the first reading.
+    _chunk_readings = None
+
+    #: The :class:`korean.cache.LRUCache` of readings by numbers.
+    reading_cache = LRUCache(4096)
+
     def __init__(self, number):
         self.number = number
 
@@ -87,11 +205,18 @@ class NumberWord(Substantive):
             >>> NumberWord.read(0)
             '영'
         """
-        return ''.join(type(self).read_phases(self.number))
+        try:
+            return self.reading_cache[self.number]
+        except KeyError:
+            pass
+        rv = ''.join(type(self).read_phases(self.number))
+        self.reading_cache[self.number] = rv
+        return rv
 
     @classmethod
     def read_phases(cls, number):
-        """Reads number as Korean but seperates the result at each 10k.
+        """Reads number as Korean but seperates the result at each 10k. Each
+        10k is read by a precomputed table of 0 to 9999.
 
             >>> NumberWord.read_phases(1234567890)
             ('십이억', '삼천사백오십육만', '칠천팔백구십')
@@ -99,51 +224,101 @@ class NumberWord(Substantive):
             ('만', '')
             >>> NumberWord.read_phases(0)
             ('영',)
-        """
-        phase = deque()
-        chunks = deque()
 
+        Raises :exc:`ValueError` if the number is too large to have a name of
+        its largest place.
+        """
+        if not data.loaded:
+            data.ensure_loaded()
+        if not number:
+            return (cls.__numbers__[0],)
+        readings = cls._chunk_readings or cls._build_chunk_readings()
+        chunks = []
         negative = number < 0
         number = abs(number)
-
-        for digit in itertools.count():
-            unit = number % 10
-            number //= 10
-
-            if digit >= 4 and digit % 4 == 0:
+        place = (len(str(number)) - 1) // 4 * 4
+        if place and place not in cls.__digits__:
+            raise ValueError('number too large')
+        for place in itertools.count(0, 4):
+            number, chunk = divmod(number, 10000)
+            if not place:
+                chunks.append(readings[chunk])
+            elif not chunk:
+                chunks.append('')
+            elif chunk == 1 and not number:
+                # 일만, 일억 -> 만, 억
+                chunks.append(cls.__digits__[place])
+            else:
                 # 만, 억, 조, ...
-                phase.appendleft(cls.__digits__[digit])
-
-            if unit:
-                if digit % 4 != 0:
-                    # 십, 백, 척
-                    phase.appendleft(cls.__digits__[digit % 4])
-
-                if unit != 1 or digit % 4 == 0:
-                    # 일, 이, 삼, ...
-                    phase.appendleft(cls.__numbers__[unit])
-
-            if not number or digit % 4 == 3:
-                if not number or digit < 4 or len(phase) > 1:
-                    chunks.appendleft(''.join(phase))
-                else:
-                    chunks.appendleft('')
-                phase.clear()
-
+                chunks.append(readings[chunk] + cls.__digits__[place])
             if not number:
                 break
+        if negative:
+            chunks.append(cls.__unary_operations__['-'])
+        chunks.reverse()
+        return tuple(chunks)
 
-        # 일만, 일억 -> 만, 억
-        one = cls.__numbers__[1]
-        for place in cls.__digits__.values():
-            if chunks[0].startswith(one + place):
-                chunks[0] = chunks[0][len(one):]
-                break
+    @classmethod
+    def read_many(cls, numbers, phases=False, ending=False):
+        """Reads many numbers at once without making :class:`NumberWord`
+        objects. The same numbers in the batch are read only once.
+
+            >>> NumberWord.read_many([1, 20, 10000])
+            ['일', '이십', '만']
+            >>> NumberWord.read_many([1, 20, 10000], phases=True)
+            [('일',), ('이십',), ('만', '')]
+            >>> NumberWord.read_many([1, 20, 10000], ending=True)
+            [2, 1, 1]
+
+        .. versionadded:: 0.1.10
+
+        :param numbers: a sequence or a NumPy array of integers.
+        :param phases: returns the results of :meth:`read_phases` instead.
+        :param ending: returns only the ending classes such as
+                       :data:`RIEUL_ENDING` instead.
+        """
+        if phases and ending:
+            raise TypeError('Cannot specify phases and ending both')
+        results = {}
+        rv = []
+        for number in numbers:
+            number = int(number)
+            try:
+                result = results[number]
+            except KeyError:
+                result = cls.read_phases(number)
+                if not phases:
+                    result = ''.join(result)
+                    if ending:
+                        result = ending_of_char(result[-1])
+                results[number] = result
+            rv.append(result)
+        return rv
 
-        if negative:
-            chunks.appendleft(cls.__unary_operations__['-'])
+    @classmethod
+    def _build_chunk_readings(cls):
+        """Builds the readings of 0 to 9999 without 만, 억, 조, ..."""
+        if not data.loaded:
+            data.ensure_loaded()
+        readings = []
+        for chunk in range(10000):
+            phase = []
+            for place in range(3, -1, -1):
+                unit = chunk // 10 ** place % 10
+                if not unit:
+                    continue
+                if unit != 1 or not place:
+                    # 일, 이, 삼, ...
+                    phase.append(cls.__numbers__[unit])
+                if place:
+                    # 십, 백, 천
+                    phase.append(cls.__digits__[place])
+            readings.append(''.join(phase))
+        cls._chunk_readings = tuple(readings)
+        return cls._chunk_readings
 
-        return tuple(chunks)
+    def _key(self):
+        return self.number
 
     def basic(self):
         return unicode(self.number)
@@ -169,26 +344,100 @@ class Loanword(Substantive):
     transcribes a non-Korean word into Hangul.
 
     .. versionadded:: 0.1.4
+
+    .. versionchanged:: 0.1.10
+       Readings are cached in :attr:`reading_cache` and languages are cached
+       in :attr:`langs`.
     """
 
-    def _import_hangulize(self):
+    __slots__ = ('lang',)
+
+    #: The cache of readings by :meth:`reading_key`. It's a
+    #: :class:`korean.cache.LRUCache` by default. Replace it with a
+    #: :class:`korean.cache.TieredCache` to keep the readings in a file for
+    #: other processes::
+    #:
+    #:    Loanword.reading_cache = TieredCache(SQLiteCache('loanwords.db'))
+    reading_cache = LRUCache(4096)
+
+    #: The Hangulize languages resolved by :meth:`get_lang` by
+    #: ``(code, iso639)``. They are shared in the process.
+    langs = {}
+
+    @classmethod
+    def _import_hangulize(cls):
+        global _hangulize
+        if _hangulize is None:
+            try:
+                import hangulize
+            except ImportError:
+                raise ImportError('%s needs hangulize>=0.0.5' % cls.__name__)
+            _hangulize = hangulize
+        return _hangulize
+
+    @classmethod
+    def get_lang(cls, code, iso639=None):
+        """Resolves the Hangulize language. Building a language is expensive
+        so it is cached in :attr:`langs`.
+
+        .. versionadded:: 0.1.10
+        """
         try:
-            return self._hangulize
-        except AttributeError:
+            return cls.langs[code, iso639]
+        except KeyError:
             pass
-        try:
-            import hangulize
-        except ImportError:
-            raise ImportError('%s needs hangulize>=0.0.5' %
-                              type(self).__name__)
-        self._hangulize = hangulize
-        return hangulize
+        lang = cls._import_hangulize().get_lang(code, iso639)
+        cls.langs[code, iso639] = lang
+        return lang
+
+    @classmethod
+    def preload(cls, codes):
+        """Resolves the languages before the first use. It fits to the start
+        of a server or a worker process::
+
+           Loanword.preload(['ita', 'nld', ('fr', 1)])
+
+        :param codes: language codes or ``(code, iso639)`` pairs.
+
+        .. versionadded:: 0.1.10
+        """
+        for code in codes:
+            if isinstance(code, tuple):
+                cls.get_lang(*code)
+            else:
+                cls.get_lang(code)
 
     def __init__(self, word, code=None, iso639=None, lang=None):
-        hangulize = self._import_hangulize()
-        self.lang = lang or hangulize.get_lang(code, iso639)
+        self.lang = lang or self.get_lang(code, iso639)
         super(Loanword, self).__init__(word)
 
+    @property
+    def lang_code(self):
+        """The code of the Hangulize language such as ``'ita'``.
+
+        .. versionadded:: 0.1.10
+        """
+        return self._code_of(self.lang)
+
+    @staticmethod
+    def _code_of(lang):
+        code = getattr(lang, 'code', None)
+        if not isinstance(code, six.string_types):
+            module = type(lang).__module__
+            code = module.rsplit('hangulize.langs.', 1)[-1]
+        return code
+
+    @staticmethod
+    def reading_key(word, lang_code):
+        """The key of a reading in :attr:`reading_cache`.
+
+        .. versionadded:: 0.1.10
+        """
+        return '{0}\t{1}'.format(lang_code, word)
+
+    def _key(self):
+        return (self.basic(), self.lang_code)
+
     def read(self):
         """Transcribes into Hangul using `Hangulize
         <http://packages.python.org/hangulize>`_.
@@ -200,5 +449,131 @@ class Loanword(Substantive):
         >>> Loanword('Leonardo da Vinci', 'ita').read()
         '레오나르도 다 빈치'
         """
+        key = self.reading_key(self.basic(), self.lang_code)
+        try:
+            return self.reading_cache[key]
+        except KeyError:
+            pass
         hangulize = self._import_hangulize()
-        return hangulize.hangulize(self.basic(), lang=self.lang)
+        rv = hangulize.hangulize(self.basic(), lang=self.lang)
+        self.reading_cache[key] = rv
+        return rv
+
+    @classmethod
+    def warm_up(cls, path, encoding='utf-8'):
+        """Fills :attr:`reading_cache` with the readings in the file. Each
+        line of the file has a language code, a word and the reading
+        separated by tabs:
+
+        .. sourcecode:: text
+
+           ita\titalia\t이탈리아
+           nld\tGuido van Rossum\t히도 판로쉼
+
+        Returns the number of the readings.
+
+        .. versionadded:: 0.1.10
+        """
+        import io
+        items = []
+        with io.open(path, 'r', encoding=encoding) as f:
+            for line in f:
+                line = line.rstrip('\r\n')
+                if not line:
+                    continue
+                lang_code, word, reading = line.split('\t')
+                items.append((cls.reading_key(word, lang_code), reading))
+        cls.reading_cache.update(items)
+        return len(items)
+
+    @classmethod
+    def read_many(cls, words, code=None, iso639=None, workers=None,
+                  chunksize=256):
+        """Transcribes many words into Hangul. The words are grouped by the
+        language and the language is resolved once per group. Words found in
+        :attr:`reading_cache` are not transcribed again. The others are
+        transcribed in a process pool if ``workers`` is more than 1. Each
+        worker process preloads the languages of the words.
+
+            >>> Loanword.read_many(['italia', ('Guido', 'nld')], 'ita')
+            ['이탈리아', '히도']
+
+        A word which fails doesn't abort the batch. Its exception is in the
+        results instead of the reading.
+
+        :param words: words or ``(word, code)`` pairs.
+        :param code: the language code of the words which are not paired.
+        :param iso639: the ISO 639 version of the code.
+        :param workers: the number of processes.
+        :param chunksize: the number of words in a task for a process.
+
+        .. versionadded:: 0.1.10
+        """
+        cls._import_hangulize()
+        groups = {}
+        for x, item in enumerate(words):
+            if isinstance(item, tuple):
+                word, key = item[0], (item[1], None)
+            else:
+                word, key = item, (code, iso639)
+            groups.setdefault(key, []).append((x, word))
+        results = [None] * sum(map(len, groups.values()))
+        tasks, lang_codes = [], {}
+        for (lang_code, lang_iso639), items in six.iteritems(groups):
+            try:
+                lang = cls.get_lang(lang_code, lang_iso639)
+            except Exception as exc:
+                for x, word in items:
+                    results[x] = exc
+                continue
+            lang_codes[lang_code, lang_iso639] = cls._code_of(lang)
+            misses = []
+            for x, word in items:
+                key = cls.reading_key(word, cls._code_of(lang))
+                try:
+                    results[x] = cls.reading_cache[key]
+                except KeyError:
+                    misses.append((x, word))
+            for start in range(0, len(misses), chunksize):
+                chunk = misses[start:start + chunksize]
+                tasks.append((lang_code, lang_iso639, chunk))
+        if workers is not None and workers > 1 and len(tasks) > 1:
+            import multiprocessing
+            pool = multiprocessing.Pool(workers, cls.preload,
+                                        (list(lang_codes),))
+            try:
+                done = pool.map(_transcribe, tasks)
+            finally:
+                pool.terminate()
+                pool.join()
+        else:
+            done = map(_transcribe, tasks)
+        for (lang_code, lang_iso639, chunk), transcribed in zip(tasks, done):
+            for (x, word), (ok, value) in zip(chunk, transcribed):
+                results[x] = value
+                if ok:
+                    key = cls.reading_key(word, lang_codes[lang_code,
+                                                           lang_iso639])
+                    cls.reading_cache[key] = value
+        return results
+
+
+def _transcribe(args):
+    """Transcribes a chunk of words in the same language. It might run in a
+    worker process. Returns a list of ``(ok, reading or exception)``.
+    """
+    code, iso639, items = args
+    hangulize = Loanword._import_hangulize()
+    lang = Loanword.get_lang(code, iso639)
+    rv = []
+    for x, word in items:
+        try:
+            rv.append((True, hangulize.hangulize(word, lang=lang)))
+        except Exception as exc:
+            try:
+                pickle.dumps(exc)
+            except Exception:
+                # an exception should come back from a worker process
+                exc = RuntimeError(repr(exc))
+            rv.append((False, exc))
+    return rv
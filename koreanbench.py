@@ -0,0 +1,344 @@
+# -*- coding: utf-8 -*-
+"""Micro benchmarks for hot paths of :mod:`korean`. Run it directly::
+
+   $ python koreanbench.py
+   $ python koreanbench.py proofread
+
+Each benchmark prints the best per-call time of a few repeats.
+"""
+from __future__ import print_function, unicode_literals
+import sys
+import timeit
+
+from korean import *
+
+
+BENCHMARKS = []
+
+
+def benchmark(func):
+    BENCHMARKS.append(func)
+    return func
+
+
+def measure(name, func, number=1000, repeat=3):
+    """Prints the best per-call time of ``func`` in microseconds."""
+    best = min(timeit.Timer(func).repeat(repeat, number)) / number
+    print('{0:<40} {1:>12.2f} us'.format(name, best * 1e6))
+    return best
+
+
+def python_command(code):
+    """Makes the command to run the code in a fresh interpreter. The code has
+    unicode literals on Python 2 too.
+    """
+    if sys.version_info < (3,):
+        code = '# -*- coding: utf-8 -*-\n' \
+               'from __future__ import unicode_literals\n' + code
+        return [sys.executable.encode('utf-8'), b'-c', code.encode('utf-8')]
+    return [sys.executable, '-c', code]
+
+
+SHORT_TEXT = '용사은(는) 검을(를) 획득했다.'
+LONG_TEXT = '\n'.join([
+    '나의 영혼 물어다줄 평화시장 비둘기 위(으)로 떨어지는 투명한 소나기',
+    '다음날엔 햇빛 쏟아지길 바라며 참아왔던 고통이(가) 찢겨져 버린 가지',
+    '따스한 봄바람이(가) 불고 또 불어도 미싱은(는) 잘도 도네 돌아가네',
+    '결국 자신 스스로(을)를 죽음에데스(으)로 몰아갔다.',
+] * 50)
+
+
+@benchmark
+def proofread():
+    measure('proofread (short)', lambda: l10n.proofread(SHORT_TEXT))
+    measure('proofread (long, %d chars)' % len(LONG_TEXT),
+            lambda: l10n.proofread(LONG_TEXT), number=20)
+
+
+def add_particles(count):
+    """Registers ``count`` made-up allomorphic particles."""
+    for x in range(count):
+        syllables = [hangul.join_char(hangul.split_char((x * 2 + y) * 7))
+                     for y in (0, 1)]
+        particle = Particle(syllables[0] + '요', syllables[1] + '요')
+        for form in particle.forms:
+            Particle.register(form, particle)
+
+
+@benchmark
+def scan():
+    text = LONG_TEXT * 10
+    size = len(text.encode('utf-8')) / 1e6
+    added = 0
+    for count in [0, 100, 400]:
+        add_particles(count - added)
+        added = count
+        l10n.proofread.parse(text)  # warm up
+        best = measure('parse (+%d particles)' % count,
+                       lambda: l10n.proofread.parse(text), number=5)
+        print('{0:<40} {1:>12.2f} MB/s'.format('', size / best))
+
+
+@benchmark
+def jamo():
+    measure('hangul.split_char', lambda: hangul.split_char('한'), 100000)
+    measure('hangul.get_final', lambda: hangul.get_final('글'), 100000)
+    measure('hangul.join_char', lambda: hangul.join_char(('ㄱ', 'ㅡ', 'ㄹ')),
+            100000)
+    measure('merge', lambda: morphology.merge(Noun('서버'), Particle('일랑')),
+            10000)
+    measure('merge without rules',
+            lambda: morphology.merge(Noun('사과'), Noun('나무')), 10000)
+
+
+@benchmark
+def jamo_array():
+    text = LONG_TEXT * 10
+    measure('split_char over %d chars' % len(text),
+            lambda: [hangul.split_char(c)
+                     for c in text if hangul.is_hangul(c)],
+            number=3)
+    measure('split_array over %d chars' % len(text),
+            lambda: hangul.split_array(text), number=3)
+
+
+@benchmark
+def reading():
+    for maxsize in [0, 4096]:
+        Noun.reading_cache.resize(maxsize)
+        NumberWord.reading_cache.resize(maxsize)
+        measure('Noun.read (cache size %d)' % maxsize,
+                lambda: Noun('레벨 42').read(), 10000)
+        measure('NumberWord.read (cache size %d)' % maxsize,
+                lambda: NumberWord(1234567890).read(), 10000)
+        measure('format (cache size %d)' % maxsize,
+                lambda: '{0:은}'.format(Noun('용사')), 10000)
+
+
+@benchmark
+def pick():
+    particle, noun = Particle('을'), Noun('마법서 "파이어 볼"')
+    measure('pick_allomorph after Noun',
+            lambda: morphology.pick_allomorph(particle, suffix_of=noun), 10000)
+    measure('format with particle',
+            lambda: '{0:을}'.format(Noun('마법서 "파이어 볼"')), 10000)
+
+
+@benchmark
+def numbers():
+    for number in [42, 1234567890, 98765432109876543210]:
+        measure('NumberWord.read_phases(%d)' % number,
+                lambda: NumberWord.read_phases(number), 10000)
+
+
+@benchmark
+def numbers_batch():
+    numbers = list(range(0, 10 ** 9, 10 ** 5 + 7))
+    measure('NumberWord(n).read() x %d' % len(numbers),
+            lambda: [NumberWord(n).read() for n in numbers], 3)
+    measure('NumberWord.read_many() x %d' % len(numbers),
+            lambda: NumberWord.read_many(numbers), 3)
+    measure('NumberWord.read_many(ending=True) x %d' % len(numbers),
+            lambda: NumberWord.read_many(numbers, ending=True), 3)
+
+
+@benchmark
+def memory():
+    for cls, arg in [(Noun, '용사'), (NumberWord, 42), (Particle, '에게')]:
+        obj = cls(arg)
+        size = sys.getsizeof(obj)
+        # an object without __slots__ has its attributes in __dict__
+        if hasattr(obj, '__dict__'):
+            size += sys.getsizeof(obj.__dict__)
+        print('{0:<40} {1:>12d} B'.format('%s() object' % cls.__name__,
+                                          size))
+
+
+@benchmark
+def guess():
+    measure("Particle('으로부터')", lambda: Particle('으로부터'), 10000)
+    measure("'{0:은커녕}'.format(Noun)",
+            lambda: '{0:은커녕}'.format(Noun('용사')), 10000)
+
+
+@benchmark
+def template():
+    templ = l10n.Template('{0:은} {obj:을} {1}개 획득했다.')
+    measure('Template.format',
+            lambda: templ.format('용사', 3, obj='마법서'), 10000)
+
+
+@benchmark
+def gettext():
+    import gettext
+    from korean.ext.gettext import patch_gettext
+    catalog = dict(('message %d' % x, '{0:은} %d번째 {1:을} 얻었다.' % x)
+                   for x in range(5000))
+    # patch_gettext patches ugettext on Python 2
+    if hasattr(gettext.NullTranslations, 'ugettext'):
+        method = 'ugettext'
+    else:
+        method = 'gettext'
+
+    def translations():
+        t = gettext.NullTranslations()
+        t._catalog = catalog
+        setattr(t, method, lambda msg: catalog.get(msg, msg))
+        return t
+    for precompile in [False, True]:
+        measure('patch_gettext(precompile=%s) with %d messages' %
+                (precompile, len(catalog)),
+                lambda: patch_gettext(translations(), precompile), 1, 3)
+        t = patch_gettext(translations(), precompile)
+        _ = getattr(t, method)
+        assert isinstance(_('message 42'), l10n.Template)
+        measure('lookup and format (precompile=%s)' % precompile,
+                lambda: _('message 42').format('용사', '검'), 10000)
+
+
+@benchmark
+def jinja2():
+    from jinja2 import Environment
+    env = Environment(extensions=['korean.ext.jinja2.proofread'])
+    body = LONG_TEXT + '\n{{ name }}은(는) {{ obj }}을(를) 획득했다.'
+    # {% if %} in the block makes the whole block proofread at runtime
+    for label, source in [
+            ('runtime', '{% proofread %}{% if 1 %}' + body +
+                        '{% endif %}{% endproofread %}'),
+            ('compile-time', '{% proofread %}' + body + '{% endproofread %}')]:
+        templ = env.from_string(source)
+        measure('jinja2 proofread block (%s)' % label,
+                lambda: templ.render(name='용사', obj='검'), 100)
+
+
+@benchmark
+def django():
+    import django
+    from django.conf import settings
+    settings.configure(INSTALLED_APPS=('korean.ext.django',), TEMPLATES=[
+        {'BACKEND': 'django.template.backends.django.DjangoTemplates'}])
+    django.setup()
+    from django.template import Context, Template
+    body = LONG_TEXT + '\n{{ name }}은(는) {{ obj }}을(를) 획득했다.'
+    context = Context({'name': '용사', 'obj': '검'})
+    # {% if %} in the block makes the whole block proofread at runtime
+    for label, source in [
+            ('runtime', '{% proofread %}{% if 1 %}' + body +
+                        '{% endif %}{% endproofread %}'),
+            ('runtime, cache', '{% proofread cache %}{% if 1 %}' + body +
+                               '{% endif %}{% endproofread %}'),
+            ('compile-time', '{% proofread %}' + body + '{% endproofread %}')]:
+        templ = Template('{% load korean %}' + source)
+        measure('django proofread block (%s)' % label,
+                lambda: templ.render(context), 100)
+
+
+@benchmark
+def validate():
+    text = LONG_TEXT * 10
+    size = len(text.encode('utf-8')) / 1e6
+    best = measure('validate (%d chars)' % len(text),
+                   lambda: l10n.validate(text), number=5)
+    print('{0:<40} {1:>12.2f} MB/s'.format('', size / best))
+
+
+@benchmark
+def importtime():
+    import subprocess
+    for label, code in [('import korean', 'import korean'),
+                        ('import korean.hangul', 'import korean.hangul'),
+                        ('import korean + first lookup',
+                         'import korean; korean.Particle("을")'),
+                        ('import korean + proofread + read number',
+                         'import korean; korean.l10n.proofread("을(를)"); '
+                         'korean.NumberWord(12345).read()')]:
+        command = python_command(code)
+        measure(label, lambda: subprocess.check_call(command), 1, 10)
+
+
+@benchmark
+def snapshot():
+    import os
+    import subprocess
+    import tempfile
+    from korean import data
+    path = os.path.join(tempfile.mkdtemp(), 'data.pickle')
+    data.build_snapshot(path)
+    code = '''if 1:
+        import time
+        from korean import data, l10n, NumberWord
+        data.SNAPSHOT_PATH = %r
+        started_at = time.time()
+        l10n.proofread.compile()
+        NumberWord(12345).read()
+        print(time.time() - started_at)
+    '''
+    for label, snapshot_path in [('data.json', path + '.missing'),
+                                 ('snapshot', path)]:
+        command = python_command(code % snapshot_path)
+        times = [float(subprocess.check_output(command)) for x in range(10)]
+        name = 'first use after import (%s)' % label
+        print('{0:<40} {1:>12.2f} us'.format(name, min(times) * 1e6))
+
+
+@benchmark
+def particle_dict():
+    import io
+    import os
+    import tempfile
+    from korean import data
+    path = os.path.join(tempfile.mkdtemp(), 'particles.txt')
+    with io.open(path, 'w', encoding='utf-8') as f:
+        for x in range(5000):
+            syllables = [hangul.join_char(hangul.split_char(x * 2 + y))
+                         for y in (0, 1)]
+            f.write('{0}까 {1}까\n'.format(*syllables))
+    measure('load_particles (5000 particles)',
+            lambda: data.load_particles(path), 1, 3)
+    measure("Particle.get('을') after loading",
+            lambda: Particle.get('을'), 100000)
+    measure("Particle.get('을수록') after loading",
+            lambda: Particle.get('을수록'), 100000)
+    measure('proofread.compile() after loading',
+            lambda: l10n.proofread.compile(), 100000)
+
+
+@benchmark
+def tiered_cache():
+    import os
+    import tempfile
+    from korean.cache import SQLiteCache, TieredCache
+    path = os.path.join(tempfile.mkdtemp(), 'cache.db')
+    items = [('ita\tword%d' % x, '워드%d' % x) for x in range(100000)]
+    cache = TieredCache(SQLiteCache(path), 4096)
+    measure('TieredCache.update (%d items)' % len(items),
+            lambda: cache.update(items), 1, 1)
+    keys = [key for key, value in items]
+    measure('TieredCache lookup (memory)', lambda: cache[keys[-1]], 100000)
+    cache.memory.resize(0)
+    measure('TieredCache lookup (sqlite)', lambda: cache[keys[0]], 10000)
+    print(cache.stats())
+
+
+@benchmark
+def loanwords():
+    measure("Noun('italia')", lambda: Noun('italia'), 10000)
+    measure("Loanword('italia', 'ita')",
+            lambda: Loanword('italia', 'ita'), 10000)
+    words = ['gloria %d' % x for x in range(1000)]
+    Loanword.reading_cache.resize(0)
+    measure('Loanword(word).read() x %d' % len(words),
+            lambda: [Loanword(w, 'ita').read() for w in words], 1)
+    for workers in [None, 4]:
+        measure('Loanword.read_many(workers=%s) x %d' % (workers, len(words)),
+                lambda: Loanword.read_many(words, 'ita', workers=workers), 1)
+
+
+def main(names=None):
+    for func in BENCHMARKS:
+        if not names or func.__name__ in names:
+            func()
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -25,8 +25,209 @@ def disable_imports(*names):
         __builtin__.__import__ = import_
 
 
+@contextlib.contextmanager
+def restore_particles():
+    """Restores the registered particles after the block. The revision still
+    increases so that the caches built in the block become stale.
+    """
+    index = Particle._index
+    particles = index.particles
+    try:
+        yield
+    finally:
+        with index._lock:
+            index._snapshot = index._make_snapshot(index.revision + 1,
+                                                   particles)
+
+
+def run_python(*args):
+    """Runs Python in a subprocess at the directory of this file and returns
+    the stderr. The code of ``-c`` has unicode literals on Python 2 too.
+    """
+    import os
+    import subprocess
+    if sys.version_info < (3,):
+        args = list(args)
+        if '-c' in args:
+            x = args.index('-c') + 1
+            args[x] = '# -*- coding: utf-8 -*-\n' \
+                      'from __future__ import unicode_literals\n' + args[x]
+        args = tuple(arg.encode('utf-8') for arg in args)
+    cwd = os.path.dirname(os.path.abspath(__file__))
+    proc = subprocess.Popen((sys.executable,) + args, cwd=cwd,
+                            stderr=subprocess.PIPE)
+    stderr = proc.communicate()[1].decode('utf-8')
+    assert proc.returncode == 0, stderr
+    return stderr
+
+
+class TestHangul(object):
+
+    def test_split_char(self):
+        assert hangul.split_char('한') == ('ㅎ', 'ㅏ', 'ㄴ')
+        assert hangul.split_char('가') == ('ㄱ', 'ㅏ', '')
+        assert hangul.split_char(hangul.char_offset('힣')) == ('ㅎ', 'ㅣ', 'ㅎ')
+        assert hangul.get_initial('글') == 'ㄱ'
+        assert hangul.get_vowel('글') == 'ㅡ'
+        assert hangul.get_final('글') == 'ㄹ'
+        assert hangul.get_final('ㄹ') == 'ㄹ'
+        with raises(AssertionError):
+            hangul.split_char('A')
+
+    def test_join_char(self):
+        assert hangul.join_char(('ㄱ', 'ㅡ', 'ㄹ')) == '글'
+        assert hangul.join_char(('ㄱ', '', '')) == 'ㄱ'
+        with raises(ValueError):
+            hangul.join_char(('ㄸ', 'ㅏ', 'ㄸ'))
+        for offset, splitted in enumerate(hangul.SPLIT_TABLE):
+            assert hangul.split_char(offset) == splitted
+            assert ord(hangul.join_char(splitted)) == \
+                   hangul.FIRST_HANGUL + offset
+
+    def test_split_array(self):
+        import numpy
+        initials, vowels, finals = hangul.split_array('한글 Python')
+        assert list(initials.compressed()) == [18, 0]
+        assert list(vowels.compressed()) == [0, 18]
+        assert list(finals.compressed()) == [4, 8]
+        assert list(initials.mask) == [False, False] + [True] * 7
+        codes = numpy.array([ord('가'), ord('A'), ord('힣')], dtype=numpy.uint32)
+        assert list(hangul.split_array(codes)[2].filled(99)) == [0, 99, 27]
+
+    def test_join_array(self):
+        text = '밥 먹었니? 응, 먹었어.'
+        assert hangul.join_array(*hangul.split_array(text), fill=text) == text
+        assert hangul.join_array(*hangul.split_array(text)) == '밥먹었니응먹었어'
+        splitted = [hangul.split_array(text)[x] for x in range(3)]
+        splitted[2][0] = 0
+        assert hangul.join_array(*splitted, fill=text).startswith('바 ')
+
+
+class TestCache(object):
+
+    def test_lru(self):
+        from korean.cache import LRUCache
+        cache = LRUCache(2)
+        cache['a'], cache['b'] = 1, 2
+        assert cache['a'] == 1
+        cache['c'] = 3
+        assert 'b' not in cache
+        assert cache.get('b') is None
+        assert sorted(cache._data) == ['a', 'c']
+        assert cache.stats() == {'hits': 1, 'misses': 1, 'evictions': 1,
+                                 'size': 2, 'maxsize': 2}
+        cache.resize(1)
+        assert len(cache) == 1 and 'c' in cache
+        cache.resize(0)
+        cache['d'] = 4
+        assert len(cache) == 0
+        cache.resize(None)
+        for x in range(100):
+            cache[x] = x
+        assert len(cache) == 100
+
+    def test_sqlite(self, tmpdir):
+        from korean.cache import SQLiteCache
+        path = str(tmpdir.join('cache.db'))
+        cache = SQLiteCache(path)
+        cache['a'] = '가'
+        cache.update([('b', '나'), ('c', '다')])
+        assert cache['a'] == '가' and 'b' in cache and len(cache) == 3
+        with raises(KeyError):
+            cache['d']
+        assert cache.stats() == {'hits': 1, 'misses': 1, 'size': 3}
+        cache.close()
+        assert SQLiteCache(path).get('c') == '다'
+
+    def test_tiered(self):
+        from korean.cache import SQLiteCache, TieredCache
+        cache = TieredCache(SQLiteCache(':memory:'), 1)
+        cache.update([('a', '가'), ('b', '나')])
+        assert cache['b'] == '나'
+        assert cache['a'] == '가'
+        assert cache['a'] == '가'
+        assert cache.get('c') is None
+        stats = cache.stats()
+        assert stats['memory']['hits'] == 2
+        assert stats['store']['hits'] == 1
+        assert stats['misses'] == 1
+        assert stats['hit_rate'] == 0.75
+
+    def test_reading_cache(self):
+        cache = Noun.reading_cache
+        stats = cache.stats()
+        assert Noun('레벨 42').read() == '레벨 사십이'
+        assert Noun('레벨 42').read() == '레벨 사십이'
+        assert cache.stats()['hits'] == stats['hits'] + 1
+        assert cache['레벨 42'] == '레벨 사십이'
+        assert NumberWord.reading_cache[42] == '사십이'
+
+
 class TestParticle(object):
 
+    def test_lazy_data(self):
+        run_python('-c', textwrap.dedent('''
+            import sys
+            import korean.hangul
+            assert 'korean.morphology' not in sys.modules
+            assert 'six' not in sys.modules
+            from korean import data, Particle
+            assert not data.loaded
+            assert Particle('을').forms == ('를', '을', '을')
+            assert data.loaded
+            import korean
+            assert 'korean.l10n' not in sys.modules
+            assert korean.l10n.proofread('사과을(를)') == '사과를'
+            assert 'l10n' in dir(korean)
+        '''))
+
+    def test_register_before_loading(self):
+        run_python('-c', textwrap.dedent('''
+            from korean import data, Particle, NumberWord
+            particle = type.__call__(Particle, '가', '이', '이')
+            Particle.register('가', particle)
+            NumberWord.__digits__[4] = '萬'
+            assert Particle('가') is particle
+            assert Particle('을').forms == ('를', '을', '을')
+            assert NumberWord(20000).read() == '이萬'
+        '''))
+
+    def test_snapshot(self, tmpdir):
+        path = str(tmpdir.join('data.pickle'))
+        run_python('-c', 'from korean import data; '
+                         'data.build_snapshot(%r)' % path)
+        run_python('-c', textwrap.dedent('''
+            from korean import data, Particle
+            particle = type.__call__(Particle, '와나', '과나')
+            Particle._index.update({'와나': particle, '과나': particle})
+            assert data.load_snapshot(%r)
+            data.loaded = True
+            naive_map = Particle._index.naive_map()
+            assert all(naive_map[naive] is particle
+                       for naive in particle.naive())
+            assert naive_map['을(를)'] is Particle('을')
+        ''' % path))
+        run_python('-c', textwrap.dedent('''
+            import pickle
+            from korean import data, l10n, NumberWord, Particle
+            assert data.load_snapshot(%r)
+            data.loaded = True
+            naive_map = Particle._index.naive_map()
+            assert naive_map['을(를)'] is Particle('을')
+            assert Particle('을').forms == ('를', '을', '을')
+            assert NumberWord._chunk_readings[1234] == '천이백삼십사'
+            assert NumberWord(12345).read() == '만이천삼백사십오'
+            assert l10n.proofread('사과을(를)') == '사과를'
+            assert l10n.proofread.compile().particle_map is naive_map
+            with open(%r, 'rb') as f:
+                snapshot = pickle.load(f)
+            snapshot['checksum'] = 'stale'
+            with open(%r, 'wb') as f:
+                pickle.dump(snapshot, f, 2)
+            assert not data.load_snapshot(%r)
+            assert not data.load_snapshot(%r + '.missing')
+        ''' % ((path,) * 5)))
+
     def test_allomorph(self):
         # case clitics
         assert Particle('가') is Particle('이')
@@ -38,6 +239,93 @@ class TestParticle(object):
         assert Particle('는') is Particle('은')
         assert Particle('나') is Particle('이나')
 
+    def test_guess(self):
+        assert Particle('으로부터') is Particle('으로부터')
+        assert Particle('으로부터').forms == ('로부터', '으로부터', '로부터')
+        # "이라" is longer than "이" of 이/가
+        assert Particle('이라도').forms == ('라도', '이라도', '이라도')
+        assert '{0:이라도}'.format(Noun('사과')) == '사과라도'
+        with raises(KeyError):
+            Particle.guess('에게')
+
+    def test_load_particles(self, tmpdir):
+        from korean import data
+        path = tmpdir.join('particles.txt')
+        path.write_text('# extra particles\n야말로 이야말로\n마저\n', 'utf-8')
+        with restore_particles():
+            revision = Particle._index.revision
+            particles = data.load_particles(str(path))
+            assert Particle._index.revision == revision + 1
+            assert particles == [Particle('야말로'), Particle('마저')]
+            assert Particle('이야말로').forms == ('야말로', '이야말로')
+            assert '{0:이야말로}'.format(Noun('사과')) == '사과야말로'
+            assert l10n.proofread('책(이)야말로') == '책이야말로'
+            assert Particle('마저도').forms == ('마저도',)
+            assert '{0:마저도}'.format(Noun('사과')) == '사과마저도'
+            path = tmpdir.join('particles.json')
+            path.write_text('[["든지", "이든지"]]', 'utf-8')
+            data.load_particles(str(path))
+            assert Particle('든지') is Particle('이든지')
+        assert '야말로' not in Particle._index.particles
+
+    def test_particle_index(self):
+        index = morphology.ParticleIndex()
+        index.register('을', Particle('을'))
+        index.register('를', Particle('을'))
+        assert index.get('을') is Particle('을')
+        assert index.get('을수록').forms == ('를수록', '을수록', '을수록')
+        assert index.get('을수록') is index.get('을수록')
+        assert index.naive_map()['을(를)'] is Particle('을')
+        with raises(KeyError):
+            index.get('에게')
+        # only the recently guessed particles are kept
+        index.guess_cache_size = 2
+        index.register('이', Particle('이'))
+        guessed = index.get('을수록')
+        assert index.get('을수록') is guessed
+        index.get('이나마'), index.get('을까')
+        assert index.get('을수록') is not guessed
+
+    def test_concurrent_registration(self):
+        import threading
+        index = morphology.ParticleIndex()
+        class Word(Noun):
+            __slots__ = ()
+        done, errors = [], []
+        def write():
+            for x in range(300):
+                forms = ['{0}{1}요'.format(x, y) for y in '가나']
+                particle = Particle(*forms)
+                index.update(dict((form, particle) for form in forms))
+                Word.register(forms[0], Word(forms[0]))
+                Word.register(forms[1], Word(forms[1]))
+            done.append(True)
+        def read():
+            while not done:
+                particles = index.particles
+                naive_map = index.naive_map()
+                for form, particle in list(particles.items()):
+                    if any(particles.get(f) is not particle
+                           for f in particle.forms):
+                        errors.append(form)
+                if len(particles) % 2:
+                    errors.append(len(particles))
+                for form, word in list(Word._registry.items()):
+                    if word.basic() != form:
+                        errors.append(form)
+                for particle in set(naive_map.values()):
+                    index.get(particle.basic() + '부터')
+        threads = [threading.Thread(target=write)] + \
+                  [threading.Thread(target=read) for x in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert not errors
+        assert len(index.particles) == 600 and index.revision == 300
+        assert len(Word._registry) == 600
+        assert index.get('299가요부터').forms == ('299가요부터', '299나요부터')
+
     def test_naive(self):
         assert Particle('을').naive() == \
                ('를(을)', '을(를)', '(를)을', '(을)를')
@@ -69,11 +357,37 @@ class TestParticle(object):
         P, Lw = Particle, Loanword
         assert pick_allomorph(P('가'), suffix_of=Lw('Emil', 'ron')) == '이'
 
+    def test_pick_allomorph_after_ending(self):
+        P = Particle
+        assert P('로').pick_allomorph_after_ending(morphology.VOWEL_ENDING) == \
+               '로'
+        assert P('로').pick_allomorph_after_ending(
+            morphology.CONSONANT_ENDING) == '으로'
+        assert P('로').pick_allomorph_after_ending(morphology.RIEUL_ENDING) == \
+               '로'
+        assert P('에게').pick_allomorph_after_ending(
+            morphology.RIEUL_ENDING) == '에게'
+
+    def test_slots(self):
+        for morpheme in [Particle('에게'), Noun('사과'), NumberWord(1)]:
+            assert not hasattr(morpheme, '__dict__')
+
     def test_merge_with_noun(self):
         merge = morphology.merge
         P, N = Particle, Noun
         assert merge(N('게임'), P('일랑')) == '게임일랑'
         assert merge(N('서버'), P('일랑')) == '서벌랑'
+        assert merge(N('사과'), N('나무')) == '사과나무'
+
+    def test_find_allomorph_picker(self):
+        find = morphology.find_allomorph_picker
+        picker = find(Particle('을'), suffix_of=Noun('책'))
+        assert picker(Particle('을'), Noun('책')) == '을'
+        assert find(Particle('을'), suffix_of=NumberWord(1)) is picker
+        assert find(Particle('을'), prefix_of=Noun('책')) is None
+        assert find(Noun('책'), suffix_of=Particle('을')) is None
+        with raises(KeyError):
+            morphology.pick_allomorph(Noun('책'), suffix_of=Particle('을'))
 
 
 class TestNoun(object):
@@ -88,6 +402,27 @@ class TestNoun(object):
         assert Noun('레벨 50').read() == '레벨 오십'
         assert Noun('64렙').read() == '육십사렙'
 
+    def test_ending(self):
+        assert Noun('사과').ending() == morphology.VOWEL_ENDING
+        assert Noun('"검"').ending() == morphology.CONSONANT_ENDING
+        assert Noun('마을').ending() == morphology.RIEUL_ENDING
+        assert Noun('레벨 1').ending() == morphology.RIEUL_ENDING
+        assert NumberWord(3).ending() == morphology.CONSONANT_ENDING
+        with raises(AssertionError):
+            Noun('!?').ending()
+
+    def test_precompute_endings(self):
+        Noun.precompute_endings(['용사', Noun('검'), 'Korean'])
+        NumberWord.precompute_endings(range(10))
+        endings = Substantive._endings
+        assert endings[(Noun, '용사')] == morphology.VOWEL_ENDING
+        assert endings[(Noun, '검')] == morphology.CONSONANT_ENDING
+        assert endings[(NumberWord, 8)] == morphology.RIEUL_ENDING
+        assert (Noun, 'Korean') not in endings
+        stats = Noun.ending_cache.stats()
+        assert '{0:을}'.format(Noun('용사')) == '용사를'
+        assert Noun.ending_cache.stats() == stats
+
     def test_null_format(self):
         assert '{0}'.format(Noun('소년')) == '소년'
 
@@ -141,6 +476,36 @@ class TestNumberWord(object):
         assert NumberWord.read_phases(600000109) == ('육억', '', '백구')
         assert NumberWord.read_phases(-8) == ('마이너스', '팔')
         assert NumberWord.read_phases(10000) == ('만', '')
+        assert NumberWord.read_phases(0) == ('영',)
+
+    def test_read_many(self):
+        numbers = [5, 10000, -8, 5, 600000109]
+        assert NumberWord.read_many(numbers) == \
+               [NumberWord(x).read() for x in numbers]
+        assert NumberWord.read_many(numbers, phases=True) == \
+               [NumberWord.read_phases(x) for x in numbers]
+        assert NumberWord.read_many(numbers, ending=True) == \
+               [NumberWord(x).ending() for x in numbers]
+        assert NumberWord.read_many(iter([1, 2])) == ['일', '이']
+        with raises(TypeError):
+            NumberWord.read_many(numbers, phases=True, ending=True)
+
+    def test_read_many_with_numpy(self):
+        import numpy
+        numbers = numpy.array([3, 40, 500], dtype=numpy.int64)
+        assert NumberWord.read_many(numbers) == ['삼', '사십', '오백']
+
+    def test_read_large_number(self):
+        assert NumberWord(10 ** 20).read() == '해'
+        assert NumberWord(2 * 10 ** 24 + 10 ** 20).read() == '이자일해'
+        assert NumberWord(-(10 ** 68)).read() == '마이너스무량대수'
+        assert NumberWord.read_phases(10 ** 28 + 5) == \
+               ('양', '', '', '', '', '', '', '오')
+        assert NumberWord(10 ** 72 - 1).read().startswith('구천구백구십구무량대수')
+        with raises(ValueError):
+            NumberWord(10 ** 72).read()
+        with raises(ValueError):
+            NumberWord.read_phases(-(10 ** 80))
 
     def test_null_format(self):
         assert '{0}'.format(NumberWord(12)) == '12'
@@ -164,16 +529,57 @@ class TestNumberWord(object):
 
 class TestLoanword(object):
 
-    def test_need_hangulize(self):
+    def test_need_hangulize(self, monkeypatch):
+        from korean.morphology import substantive
+        monkeypatch.setattr(substantive, '_hangulize', None)
+        monkeypatch.setattr(Loanword, 'langs', {})
         with disable_imports('hangulize'):
             with raises(ImportError):
                 Loanword('štěstí', 'ces')
 
+    def test_lang_cache(self, monkeypatch):
+        monkeypatch.setattr(Loanword, 'langs', {})
+        Loanword.preload(['ita', ('nld', None)])
+        assert set(Loanword.langs) == set([('ita', None), ('nld', None)])
+        lang = Loanword.get_lang('ita')
+        assert Loanword('italia', 'ita').lang is lang
+        with disable_imports('hangulize'):
+            assert Loanword('gloria', 'ita').read() == '글로리아'
+
     def test_read(self):
         assert Loanword('italia', 'ita').read() == '이탈리아'
         assert Loanword('gloria', 'ita').read() == '글로리아'
         assert Loanword('Αλεξάνδρεια', 'ell').read() == '알렉산드리아'
 
+    def test_reading_cache(self, tmpdir):
+        from korean.cache import SQLiteCache, TieredCache
+        reading_cache = Loanword.reading_cache
+        path = tmpdir.join('loanwords.txt')
+        path.write_text('ita\tgloria\t그로리아\n', 'utf-8')
+        try:
+            Loanword.reading_cache = TieredCache(
+                SQLiteCache(str(tmpdir.join('loanwords.db'))))
+            assert Loanword.warm_up(str(path)) == 1
+            assert Loanword('gloria', 'ita').read() == '그로리아'
+            assert Loanword('italia', 'ita').read() == '이탈리아'
+            Loanword.reading_cache.memory.clear()
+            assert Loanword('italia', 'ita').read() == '이탈리아'
+            stats = Loanword.reading_cache.stats()
+            assert stats['store']['hits'] == 1
+            assert stats['misses'] == 1
+        finally:
+            Loanword.reading_cache = reading_cache
+
+    def test_read_many(self):
+        words = ['italia', ('Guido', 'nld'), ('gloria', 'zzz'), 'gloria']
+        for workers in [None, 2]:
+            readings = Loanword.read_many(words, 'ita', workers=workers,
+                                          chunksize=1)
+            assert readings[0] == '이탈리아'
+            assert readings[1] == Loanword('Guido', 'nld').read()
+            assert isinstance(readings[2], Exception)
+            assert readings[3] == '글로리아'
+
     def test_null_format(self):
         assert '{0}'.format(Loanword('Вадзім Махнеў', 'bel')) == \
                'Вадзім Махнеў'
@@ -193,6 +599,24 @@ class TestLocalization(object):
         if sys.version_info < (3,):
             assert l10n.Template('{0:로}').format(long(123)) == '123으로'
 
+    def test_template_plan(self):
+        T = l10n.Template
+        assert T('{0:은} {obj:을} {1}개 먹었다.').format(
+            '나', 3, obj='사과') == '나는 사과를 3개 먹었다.'
+        assert T('{}{:이} {{0}}').format('레벨', 4) == '레벨4가 {0}'
+        assert T('{0:을:>5}|{0!s:>3}|{0[0]}').format('한국어') == \
+               ' 한국어를|한국어|한'
+        assert T('{0:,:을}').format(19891212) == '19,891,212를'
+        assert T('{0:{1}}').format('소년', '>3') == ' 소년'
+        with raises(ValueError):
+            T('{0}{}').format('a', 'b')
+        with raises(ValueError):
+            T('{0:을:를}').format('한국어')
+        plan = T('{0:으로부터}').compile()
+        assert plan == (('0', None, '으로부터', Particle('으로부터'), ''),)
+        assert T('{0:으로부터}').compile() is plan
+        assert T('{0:{1}}').compile() is None
+
     def test_proofreading(self):
         assert l10n.proofread('사과은(는) 맛있다.') == '사과는 맛있다.'
         assert l10n.proofread('집(으)로 가자.') == '집으로 가자.'
@@ -280,12 +704,57 @@ class TestLocalization(object):
         -끝에 Fin-
         ''')
 
+    def test_proofreading_cache(self):
+        proofread = l10n.Proofreading([type(''), Particle])
+        scanner = proofread.compile()
+        assert proofread.compile() is scanner
+        assert scanner.particle_map['을(를)'] is Particle('을')
+        with restore_particles():
+            Particle.register('을', Particle('을'))
+            assert proofread.compile() is not scanner
+            assert proofread('집(으)론 안 돼') == '집으론 안 돼'
+
+    def test_proofreading_stream(self):
+        text = '용사은(는) 레벨 10이(가) 되었다. 집(으)로 (으)로 "쥐"은(는)' * 3
+        expectation = l10n.proofread(text)
+        for size in [1, 2, 3, 7, len(text)]:
+            chunks = [text[x:x + size] for x in range(0, len(text), size)]
+            assert ''.join(l10n.proofread_stream(chunks)) == expectation
+        assert list(l10n.proofread_stream([])) == []
+        assert ''.join(l10n.proofread_stream(['집(으', ')로'])) == '집으로'
+
+    def test_lookbehind(self):
+        lookbehind = l10n.proofread.lookbehind
+        assert lookbehind('용사') == '사'
+        assert lookbehind('"파이어 볼"') == '볼'
+        assert lookbehind('레벨 10000') == '10000'
+        assert lookbehind('!?') == ''
+
+    def test_particle_scanner(self):
+        P = Particle
+        scanner = l10n.ParticleScanner({'을(를)': P('을'), '(를)을': P('을'),
+                                        '(으)로': P('로'), '(으)론': P('론')})
+        assert list(scanner.finditer('말을(를)(를)을 (으)론(으)로 (으)')) == \
+               [(1, 5, P('을')), (5, 9, P('을')), (10, 14, P('론')),
+                (14, 18, P('로'))]
+        assert list(scanner.finditer('(을)를 (이)나')) == []
+
     def test_parse(self):
         assert l10n.proofread.parse('말을(를)(를)') == \
                ('말', Particle('를'), '(를)')
         assert l10n.proofread.parse('용사은(는) 감를(을) 먹었다.') == \
                ('용사', Particle('은'), ' 감', Particle('을'), ' 먹었다.')
 
+    def test_validate(self):
+        assert l10n.validate('사과을 먹고 책를 읽었다.') == \
+               [(2, 3, '사과을', '를'), (8, 9, '책를', '을')]
+        assert l10n.validate('연필으로 쓰고 가을와 마을을 보았다.') == \
+               [(2, 4, '연필으로', '로'), (10, 11, '가을와', '과')]
+        assert l10n.validate('가을, 마을, 사과를, 책을, 연필로 쓴다.') == []
+        assert l10n.validate('을 사과을에') == []
+        validate = l10n.ParticleValidator(['은'], ['지은'])
+        assert validate('사과은 지은') == [(2, 3, '사과은', '는')]
+
 
 class TestExtensions(object):
 
@@ -368,6 +837,18 @@ class TestExtensions(object):
         assert gen_text('콩', 1) == '여기 콩이 있습니다.'
         assert gen_text('사과', 2) == '여기 사과가 2개 있습니다.'
 
+    def test_precompiled_gettext(self):
+        from korean.ext.gettext import patch_gettext
+        t = patch_gettext(self.generate_translations(), precompile=True)
+        _, ngettext = self.gettext_functions(t)
+        templ = _('I like a {0}.')
+        assert _('I like a {0}.') is templ
+        assert templ._compiled[1][1][3] is Particle('을')
+        assert templ.format('바나나') == '나는 바나나를 좋아합니다.'
+        assert ngettext('Here is a {0}.', 'Here are {1} {8}.', 2) is \
+               ngettext('Here is a {0}.', 'Here are {1} {8}.', 3)
+        assert isinstance(_('Undefined'), l10n.Template)
+
     def test_deprecated_patch_gettext(self):
         t = deprecated_call(l10n.patch_gettext, self.generate_translations())
         _, ngettext = self.gettext_functions(t)
@@ -418,16 +899,64 @@ class TestExtensions(object):
         ''')
         assert templ7.render(locale='ko_KR', **context).strip() == expectation
 
+    def test_jinja2_ext_precompiled(self):
+        from jinja2 import Environment
+        env = Environment(extensions=['korean.ext.jinja2.proofread'])
+        source = '''{% proofread %}{{ name }}은(는) 집(으)로 갔다. \
+{{ obj }}"을(를)" {{ 3 }}(이)다.{% endproofread %}'''
+        call = env.parse(source).body[0].call
+        assert ' 집으로 갔다. ' in call.args[0].value[1][1]
+        templ = env.from_string(source)
+        assert templ.render(name='용사', obj='검') == \
+               '용사는 집으로 갔다. 검"을" 3이다.'
+        # the same as proofreading the whole output at runtime
+        assert templ.render(name='아이템이(가)', obj='책') == \
+               '아이템이는(은) 집으로 갔다. 책"을" 3이다.'
+        templ = env.from_string('''{% proofread %}\
+{{ user }}님이 사과{{ count }}을(를) 샀다. {{ a }}{{ b }}(이)다.\
+{% endproofread %}''')
+        assert templ.render(user='용사', count='', a='3', b='"') == \
+               '용사님이 사과를 샀다. 3"이다.'
+        assert templ.render(user='용사', count=3, a='책', b='') == \
+               '용사님이 사과3을 샀다. 책이다.'
+        env = Environment(extensions=['korean.ext.jinja2.proofread'],
+                          finalize=lambda x: '' if x is None else x)
+        templ = env.from_string('''{% proofread %}\
+{{ x }}사과을(를){% endproofread %}''')
+        assert templ.render(x=None) == '사과를'
+        templ = env.from_string('''{% proofread %}\
+{% for x in items %}{{ x }}은(는) {% endfor %}{% endproofread %}''')
+        assert templ.render(items=['용사', '마법사']) == '용사는 마법사는 '
+        env = Environment(extensions=['korean.ext.jinja2.proofread'],
+                          autoescape=True)
+        templ = env.from_string('''{% proofread on %}\
+<b>{{ name }}(을)를</b> {{ obj }}(으)로{% endproofread %}''')
+        assert templ.render(on=True, name='<용사> & 기사', obj='칼') == \
+               '<b>&lt;용사&gt; &amp; 기사를</b> 칼로'
+        assert templ.render(on=False, name='<용사>', obj='칼') == \
+               '<b>&lt;용사&gt;(을)를</b> 칼(으)로'
+
     def test_deprecated_jinja2_ext_location(self):
         from jinja2 import Environment
         old_ext_name = 'korean.l10n.jinja2ext.proofread'
         env = deprecated_call(Environment, extensions=[old_ext_name])
         assert 'proofread' in env.filters
 
-    def test_django_ext(self):
+    def configure_django(self):
+        import django
         from django.conf import settings
+        if settings.configured:
+            return
+        settings.configure(INSTALLED_APPS=('korean.ext.django',), TEMPLATES=[
+            {'BACKEND': 'django.template.backends.django.DjangoTemplates'}],
+            CACHES={'default': {
+                'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+        if hasattr(django, 'setup'):
+            django.setup()
+
+    def test_django_ext(self):
         from django.template import Context, Template
-        settings.configure(INSTALLED_APPS=('korean.ext.django',))
+        self.configure_django()
         context = Context({'name': '용사', 'obj': '검'})
         expectation = '용사는 검을 획득했다.'
         templ1 = Template('''
@@ -443,13 +972,208 @@ class TestExtensions(object):
         ''')
         assert templ2.render(context).strip() == expectation
 
+    def test_django_ext_precompiled(self):
+        from django.template import Context, Template, TemplateSyntaxError
+        from korean.ext.django.templatetags.korean import proofread_cache
+        self.configure_django()
+        templ = Template('''{% load korean %}{% proofread %}\
+{{ name }}은(는) 집(으)로 갔다. {{ obj }}"을(를)" {{ 3 }}(이)다.\
+{% endproofread %}''')
+        node = templ.nodelist[-1]
+        assert len(node.bits[0]) == 3
+        assert node.bits[1][1][:2] == ('은(는)', ' 집으로 갔다. ')
+        assert templ.render(Context({'name': '용사', 'obj': '검'})) == \
+               '용사는 집으로 갔다. 검"을" 3이다.'
+        context = Context({'name': '아이템이(가) & 검', 'obj': '책'})
+        assert templ.render(context) == \
+               '아이템이 &amp; 검은 집으로 갔다. 책"을" 3이다.'
+        templ = Template('''{% load korean %}{% proofread %}\
+{% for x in items %}{{ x }}은(는) {% endfor %}{% endproofread %}''')
+        assert templ.nodelist[-1].bits is None
+        assert templ.render(Context({'items': ['용사', '마법사']})) == \
+               '용사는 마법사는 '
+        templ = Template('''{% load korean %}{% proofread %}\
+{{ user }}님이 사과{{ count }}을(를) 샀다.{% endproofread %}''')
+        assert templ.render(Context({'user': '용사', 'count': ''})) == \
+               '용사님이 사과를 샀다.'
+        assert templ.render(Context({'user': '용사', 'count': 3})) == \
+               '용사님이 사과3을 샀다.'
+        proofread_cache.clear()
+        templ = Template('''{% load korean %}{% proofread cache %}\
+{{ name }}은(는){% endproofread %}''')
+        assert templ.render(Context({'name': '용사'})) == '용사는'
+        assert templ.render(Context({'name': '용사'})) == '용사는'
+        assert templ.render(Context({'name': '검'})) == '검은'
+        assert len(proofread_cache) == 2
+        templ = Template('''{% load korean %}{% proofread cache %}\
+{{ name }}은(는) 집에 갔다{% endproofread %}{% proofread cache %}\
+{{ name }}을(를) 먹었다{% endproofread %}''')
+        assert templ.render(Context({'name': '용사'})) == \
+               '용사는 집에 갔다용사를 먹었다'
+        assert len(proofread_cache) == 4
+        templ = Template('''{% load korean %}{% proofread cache key %}\
+{{ name }}은(는){% endproofread %}''')
+        assert templ.render(Context({'name': '용사', 'key': 'a'})) == '용사는'
+        assert templ.render(Context({'name': '검', 'key': 'a'})) == '용사는'
+        assert templ.render(Context({'name': '검', 'key': 'b'})) == '검은'
+        with raises(TemplateSyntaxError):
+            Template('{% load korean %}{% proofread foo %}{% endproofread %}')
+
+    def test_django_ext_cache_framework(self):
+        from django.core.cache import caches
+        from django.template import Context, Template
+        from django.test.utils import override_settings
+        self.configure_django()
+        templ = Template('''{% load korean %}{% proofread cache key %}\
+{{ name }}은(는){% endproofread %}''')
+        with override_settings(KOREAN_PROOFREAD_CACHE='default'):
+            caches['default'].clear()
+            assert templ.render(Context({'name': '용사', 'key': 'c'})) == \
+                   '용사는'
+            assert templ.render(Context({'name': '검', 'key': 'c'})) == \
+                   '용사는'
+            assert caches['default'].get('korean.proofread:key:c') == '용사는'
+
+
+class TestCommandLine(object):
+
+    def test_read_line_chunks(self):
+        from io import BytesIO
+        from korean.__main__ import read_line_chunks
+        data = b'a\nbb\n\nccc\ndddd'
+        for size in [1, 2, 3, 5, len(data)]:
+            chunks = list(read_line_chunks(BytesIO(data), size))
+            assert b''.join(chunks) == data
+            assert all(chunk.endswith(b'\n') for chunk in chunks[:-1])
+
+    def test_proofread(self, tmpdir, monkeypatch, capsys):
+        from io import BytesIO
+        import korean.__main__
+        text = '용사은(는) 레벨 10이(가) 되었다.\n"쥐"을(를) 잡(으)러 가자\n'
+        data = (text * 5000).encode('utf-8') + '끝이(가)'.encode('utf-8')
+        expectation = l10n.proofread(data.decode('utf-8')).encode('utf-8')
+        path = tmpdir.join('input.txt')
+        path.write_binary(data)
+        def proofread(path=None, **kwargs):
+            output = BytesIO()
+            monkeypatch.setattr(korean.__main__, 'stdout', output)
+            monkeypatch.setattr(sys, 'stdin', BytesIO(data))
+            korean.__main__.proofread(path, **kwargs)
+            return output.getvalue()
+        for jobs in [1, 2]:
+            assert proofread(str(path), jobs=jobs) == expectation
+            assert proofread(jobs=jobs) == expectation
+        proofread(str(path), jobs=2, report=True)
+        assert capsys.readouterr()[1].startswith('10000 lines, ')
+
+    def test_main(self, tmpdir):
+        import os
+        import subprocess
+        data = '용사은(는) 검을(를) 얻었다.\n'.encode('utf-8') * 3
+        path = tmpdir.join('input.txt')
+        path.write_binary(data)
+        cwd = os.path.dirname(os.path.abspath(__file__))
+        for jobs in ['1', '2']:
+            for args in [[str(path)], []]:
+                args = [sys.executable, '-m', 'korean', 'proofread'] + \
+                       args + ['--jobs', jobs]
+                with path.open('rb') as f:
+                    output = subprocess.check_output(
+                        [str(arg) for arg in args], stdin=f, cwd=cwd)
+                assert output == '용사는 검을 얻었다.\n'.encode('utf-8') * 3
+
+    def write_mo(self, path, messages):
+        """Writes the dict of messages as a Gettext catalog in UTF-8."""
+        import struct
+        messages = dict(messages)
+        messages[''] = 'Content-Type: text/plain; charset=utf-8\n'
+        messages = sorted((msgid.encode('utf-8'), msgstr.encode('utf-8'))
+                          for msgid, msgstr in messages.items())
+        ids, strs, offsets = b'', b'', []
+        for msgid, msgstr in messages:
+            offsets.append((len(ids), len(msgid), len(strs), len(msgstr)))
+            ids += msgid + b'\0'
+            strs += msgstr + b'\0'
+        ids_start = 7 * 4 + 16 * len(messages)
+        strs_start = ids_start + len(ids)
+        table = []
+        for id_offset, id_length, str_offset, str_length in offsets:
+            table += [id_length, ids_start + id_offset]
+        for id_offset, id_length, str_offset, str_length in offsets:
+            table += [str_length, strs_start + str_offset]
+        path.write_binary(struct.pack('<7I', 0x950412de, 0, len(messages), 28,
+                                      28 + 8 * len(messages), 0, 0) +
+                          struct.pack('<%dI' % len(table), *table) +
+                          ids + strs)
+
+    def test_validate(self, tmpdir, monkeypatch):
+        from io import BytesIO
+        import json
+        import korean.__main__
+        tmpdir.join('a.txt').write_binary('사과을 먹었다.\n책을 읽었다.\n'
+                                          '가을와 겨울\n'.encode('utf-8'))
+        tmpdir.join('b.po').write_binary('msgid "책를"\nmsgstr ""\n'
+                                         '"책를 읽었다."\n'.encode('utf-8'))
+        self.write_mo(tmpdir.join('c.mo'), {'pencil': '연필으로 쓴다',
+                                            'apple': '사과를 먹었다'})
+        tmpdir.join('d.rst').write_binary('사과을'.encode('utf-8'))
+        def validate(path=None, stdin=b'', **kwargs):
+            output = BytesIO()
+            monkeypatch.setattr(korean.__main__, 'stdout', output)
+            monkeypatch.setattr(sys, 'stdin', BytesIO(stdin))
+            try:
+                korean.__main__.validate(path, **kwargs)
+            except SystemExit as exc:
+                code = exc.code
+            else:
+                code = 0
+            output = output.getvalue().decode('utf-8')
+            return code, output.replace(str(tmpdir), '')
+        lines = ['/a.txt:1:3: 을 should be 를 (사과을)\n',
+                 '/a.txt:3:3: 와 should be 과 (가을와)\n',
+                 '/b.po:3:3: 를 should be 을 (책를)\n',
+                 '/c.mo:2:3: 으로 should be 로 (연필으로)\n']
+        for jobs in [1, 2]:
+            assert validate(str(tmpdir), jobs=jobs) == (1, ''.join(lines))
+        assert validate(str(tmpdir.join('a.txt'))) == (1, ''.join(lines[:2]))
+        assert validate(stdin='책를'.encode('utf-8')) == \
+               (1, '-:1:2: 를 should be 을 (책를)\n')
+        assert validate(str(tmpdir), exts='rst') == \
+               (1, '/d.rst:1:3: 을 should be 를 (사과을)\n')
+        code, output = validate(str(tmpdir), format='json')
+        errors = json.loads(output)
+        assert code == 1 and len(errors) == 4
+        assert errors[3] == {'path': '/c.mo', 'line': 2, 'column': 3,
+                             'word': '연필으로', 'found': '으로',
+                             'expected': '로'}
+        # a broken catalog is reported and the others are still validated
+        tmpdir.join('b.mo').write_binary(b'not a catalog')
+        lines.insert(2, '/b.mo: Bad magic number\n')
+        assert validate(str(tmpdir), jobs=2) == (1, ''.join(lines))
+        tmpdir.remove()
+        tmpdir.mkdir().join('a.txt').write_binary('책을'.encode('utf-8'))
+        assert validate(str(tmpdir)) == (0, '')
+        assert validate(str(tmpdir), format='json') == (0, '[]\n')
+
 
 try:
     __import__('hangulize')
 except ImportError:
     del TestParticle.test_pick_allomorph_with_loanword
     del TestLoanword
+try:
+    __import__('numpy')
+except ImportError:
+    del TestHangul.test_split_array
+    del TestHangul.test_join_array
+    del TestNumberWord.test_read_many_with_numpy
 try:
     __import__('django')
 except ImportError:
     del TestExtensions.test_django_ext
+    del TestExtensions.test_django_ext_precompiled
+    del TestExtensions.test_django_ext_cache_framework
+try:
+    __import__('baker')
+except ImportError:
+    del TestCommandLine
@@ -87,6 +87,7 @@ setup(
         'Topic :: Text Processing :: Linguistic',
     ],
     install_requires=['setuptools', 'six'],
+    extras_require={'numpy': ['numpy']},
     test_suite='koreantests',
     tests_require=tests_require,
     use_2to3=(sys.version_info >= (3,)),